@@ -267,6 +267,8 @@ if [ ! -f ".env" ]; then
     sed -i "s/ALLOWED_HOSTS=.*/ALLOWED_HOSTS=$DOMAIN,localhost,127.0.0.1/" .env
     sed -i "s/DATABASE_URL=.*/DATABASE_URL=postgresql:\/\/livemanager_user:livemanager_password_2024@localhost:5432\/livemanager_db/" .env
     sed -i "s/REDIS_URL=.*/REDIS_URL=redis:\/\/localhost:6379\/0/" .env
+    # Cache partagé entre les workers (sans lui: cache propre à chaque processus)
+    grep -q "^CACHE_URL=" .env || echo "CACHE_URL=redis://localhost:6379/1" >> .env
     sed -i "s/CSRF_TRUSTED_ORIGINS=.*/CSRF_TRUSTED_ORIGINS=https:\/\/$DOMAIN/" .env
     
     # Optimisations pour upload de gros fichiers
@@ -318,7 +320,33 @@ RestartSec=3
 WantedBy=multi-user.target
 EOF
 
-# Service Celery
+# Service ASGI des événements temps réel des dashboards (/events/):
+# connexions longues, servies par uvicorn hors des workers Gunicorn
+cat > /etc/systemd/system/livemanager-events.service << EOF
+[Unit]
+Description=LiveManager Events (ASGI)
+After=network.target postgresql.service redis-server.service
+
+[Service]
+Type=simple
+User=www-data
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+Environment=PATH=$PROJECT_DIR/venv/bin
+Environment=DJANGO_SETTINGS_MODULE=livemanager.settings
+ExecStart=$PROJECT_DIR/venv/bin/gunicorn --workers 2 --worker-class uvicorn.workers.UvicornWorker --bind unix:$PROJECT_DIR/livemanager-events.sock livemanager.asgi:application
+Restart=always
+RestartSec=3
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Service Celery (file "transcode" bornée à la moitié des cœurs)
+TRANSCODE_CONCURRENCY=$(( $(nproc) / 2 ))
+[ "$TRANSCODE_CONCURRENCY" -lt 1 ] && TRANSCODE_CONCURRENCY=1
+# Nom du nœud de diffusion: worker1 consomme aussi la file "node.<nom>"
+NODE_NAME=$(hostname -s)
 cat > /etc/systemd/system/livemanager-celery.service << EOF
 [Unit]
 Description=LiveManager Celery Worker
@@ -331,9 +359,53 @@ Group=www-data
 WorkingDirectory=$PROJECT_DIR
 Environment=PATH=$PROJECT_DIR/venv/bin
 Environment=DJANGO_SETTINGS_MODULE=livemanager.settings
-ExecStart=$PROJECT_DIR/venv/bin/celery -A livemanager multi start worker1 --pidfile=/var/run/celery/%n.pid --logfile=/var/log/celery/%n%I.log --loglevel=INFO
-ExecStop=$PROJECT_DIR/venv/bin/celery multi stopwait worker1 --pidfile=/var/run/celery/%n.pid
-ExecReload=$PROJECT_DIR/venv/bin/celery -A livemanager multi restart worker1 --pidfile=/var/run/celery/%n.pid --logfile=/var/log/celery/%n%I.log --loglevel=INFO
+ExecStart=$PROJECT_DIR/venv/bin/celery -A livemanager multi start worker1 transcode -Q:worker1 celery,node.$NODE_NAME -Q:transcode transcode -c:transcode $TRANSCODE_CONCURRENCY --pidfile=/var/run/celery/%n.pid --logfile=/var/log/celery/%n%I.log --loglevel=INFO
+ExecStop=$PROJECT_DIR/venv/bin/celery multi stopwait worker1 transcode --pidfile=/var/run/celery/%n.pid
+ExecReload=$PROJECT_DIR/venv/bin/celery -A livemanager multi restart worker1 transcode -Q:worker1 celery,node.$NODE_NAME -Q:transcode transcode -c:transcode $TRANSCODE_CONCURRENCY --pidfile=/var/run/celery/%n.pid --logfile=/var/log/celery/%n%I.log --loglevel=INFO
+Restart=always
+RestartSec=3
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Service Celery beat (balayage des lives programmés, une seule instance)
+cat > /etc/systemd/system/livemanager-celerybeat.service << EOF
+[Unit]
+Description=LiveManager Celery Beat
+After=network.target postgresql.service redis-server.service
+
+[Service]
+Type=simple
+User=www-data
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+Environment=PATH=$PROJECT_DIR/venv/bin
+Environment=DJANGO_SETTINGS_MODULE=livemanager.settings
+ExecStart=$PROJECT_DIR/venv/bin/celery -A livemanager beat --schedule=/var/run/celery/celerybeat-schedule --loglevel=INFO
+Restart=always
+RestartSec=3
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Service superviseur FFmpeg (possède et relance les lives de ce nœud)
+cat > /etc/systemd/system/livemanager-supervisor.service << EOF
+[Unit]
+Description=LiveManager FFmpeg Supervisor
+After=network.target postgresql.service redis-server.service
+
+[Service]
+Type=simple
+User=www-data
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+Environment=PATH=$PROJECT_DIR/venv/bin
+Environment=DJANGO_SETTINGS_MODULE=livemanager.settings
+ExecStart=$PROJECT_DIR/venv/bin/python manage.py run_supervisor --node $NODE_NAME
+KillSignal=SIGTERM
+TimeoutStopSec=20
 Restart=always
 RestartSec=3
 
@@ -395,6 +467,18 @@ server {
         add_header Cache-Control "public";
     }
     
+    # Événements temps réel (Server-Sent Events) vers le service ASGI
+    location /events/ {
+        proxy_pass http://unix:$PROJECT_DIR/livemanager-events.sock;
+        proxy_set_header Host \$host;
+        proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto \$scheme;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_buffering off;
+        proxy_read_timeout 1h;
+    }
+
     # Proxy vers Gunicorn
     location / {
         proxy_pass http://unix:$PROJECT_DIR/livemanager.sock;
@@ -431,8 +515,14 @@ log "🔄 Démarrage des services..."
 systemctl daemon-reload
 systemctl start livemanager
 systemctl enable livemanager
+systemctl start livemanager-events
+systemctl enable livemanager-events
 systemctl start livemanager-celery
 systemctl enable livemanager-celery
+systemctl start livemanager-celerybeat
+systemctl enable livemanager-celerybeat
+systemctl start livemanager-supervisor
+systemctl enable livemanager-supervisor
 systemctl reload nginx
 
 success "Services configurés et démarrés"
@@ -468,6 +558,9 @@ ls -t | tail -n +6 | xargs -r rm
 log "📊 Vérification du statut des services..."
 systemctl is-active livemanager && success "Service livemanager actif" || error "Service livemanager inactif"
 systemctl is-active livemanager-celery && success "Service livemanager-celery actif" || error "Service livemanager-celery inactif"
+systemctl is-active livemanager-events && success "Service livemanager-events actif" || error "Service livemanager-events inactif"
+systemctl is-active livemanager-celerybeat && success "Service livemanager-celerybeat actif" || error "Service livemanager-celerybeat inactif"
+systemctl is-active livemanager-supervisor && success "Service livemanager-supervisor actif" || error "Service livemanager-supervisor inactif"
 systemctl is-active nginx && success "Service nginx actif" || error "Service nginx inactif"
 systemctl is-active postgresql && success "Service postgresql actif" || error "Service postgresql inactif"
 systemctl is-active redis-server && success "Service redis actif" || error "Service redis inactif"
@@ -0,0 +1,5 @@
+# Charger l'application Celery au démarrage de Django pour que shared_task
+# utilise la configuration CELERY_* (broker, routes des files).
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
@@ -0,0 +1,20 @@
+"""
+ASGI config for livemanager project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Required for the async views, such as the dashboard event stream (``/events/``).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "livemanager.settings")
+# Pas de connexions persistantes sous ASGI: chaque requête asynchrone peut
+# utiliser un autre thread, et les connexions ne seraient jamais rendues
+os.environ["DB_CONN_MAX_AGE"] = "0"
+
+application = get_asgi_application()
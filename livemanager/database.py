@@ -0,0 +1,45 @@
+"""
+Configuration de la base de données à partir d'une URL (``DATABASE_URL``).
+
+    postgresql://utilisateur:motdepasse@hôte:5432/base?sslmode=require
+    sqlite:////chemin/absolu/db.sqlite3
+    sqlite:///db.sqlite3  (relatif au répertoire du projet)
+
+Les paramètres de l'URL sont transmis au pilote (``OPTIONS``).
+"""
+
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+ENGINES = {
+    "postgres": "django.db.backends.postgresql",
+    "postgresql": "django.db.backends.postgresql",
+    "pgsql": "django.db.backends.postgresql",
+    "sqlite": "django.db.backends.sqlite3",
+}
+
+
+def parse_database_url(url, base_dir):
+    """Entrée ``DATABASES`` correspondant à une URL de connexion."""
+    parts = urlsplit(url)
+    engine = ENGINES.get(parts.scheme)
+    if engine is None:
+        raise ValueError(f"Base de données non supportée: {parts.scheme}")
+
+    options = dict(parse_qsl(parts.query))
+    name = unquote(parts.path[1:])
+    if parts.scheme == "sqlite":
+        return {
+            "ENGINE": engine,
+            "NAME": Path(base_dir) / name if name else ":memory:",
+            "OPTIONS": options,
+        }
+    return {
+        "ENGINE": engine,
+        "NAME": name,
+        "USER": unquote(parts.username or ""),
+        "PASSWORD": unquote(parts.password or ""),
+        "HOST": unquote(parts.hostname or ""),
+        "PORT": str(parts.port or ""),
+        "OPTIONS": options,
+    }
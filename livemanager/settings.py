@@ -2,9 +2,12 @@
 Django settings for livemanager project.
 """
 
+import socket
 from pathlib import Path
 from decouple import config
 
+from livemanager.database import parse_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -60,14 +63,32 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "livemanager.wsgi.application"
+ASGI_APPLICATION = "livemanager.asgi.application"
 
-# Database
+# Database: PostgreSQL en production (DATABASE_URL), SQLite par défaut pour
+# les petites installations (voir livemanager/database.py)
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        **parse_database_url(
+            config("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+            BASE_DIR,
+        ),
+        # Connexions persistantes, vérifiées avant d'être réutilisées
+        # (désactivées sous ASGI, voir livemanager/asgi.py)
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        # Obligatoire derrière un pooler en mode transaction (PgBouncer)
+        "DISABLE_SERVER_SIDE_CURSORS": config(
+            "DB_DISABLE_SERVER_SIDE_CURSORS", default=False, cast=bool
+        ),
     }
 }
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Attente d'un verrou d'écriture avant "database is locked" (busy_timeout);
+    # le mode WAL est activé à chaque connexion (voir streams/signals.py)
+    DATABASES["default"]["OPTIONS"].setdefault(
+        "timeout", config("SQLITE_BUSY_TIMEOUT", default=20, cast=int)
+    )
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -125,7 +146,8 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
 
 # File upload settings - Configuration optimisée pour les gros fichiers vidéo
-FILE_UPLOAD_MAX_MEMORY_SIZE = 1048576000  # 1GB - Augmenté pour les gros fichiers
+# Au-delà, les fichiers reçus en multipart passent par un fichier temporaire
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 1048576000  # 1GB - Augmenté pour les gros fichiers
 FILE_UPLOAD_TEMP_DIR = None  # Utiliser le répertoire temporaire par défaut
 FILE_UPLOAD_PERMISSIONS = 0o644  # Permissions pour les fichiers uploadés
@@ -142,8 +164,140 @@ FILE_UPLOAD_HANDLERS = [
     "django.core.files.uploadhandler.TemporaryFileUploadHandler",
 ]
 
-# Configuration pour éviter les timeouts de connexion
-CONN_MAX_AGE = 600  # 10 minutes de connexion persistante
+# Upload reprenable des vidéos (morceaux écrits directement sur le disque)
+VIDEO_UPLOAD_MAX_SIZE = config(
+    "VIDEO_UPLOAD_MAX_SIZE", default=1048576000, cast=int
+)  # 1GB
+UPLOAD_SESSION_TTL = 86400  # secondes avant suppression d'un upload abandonné
 
 # FFmpeg settings
 FFMPEG_PATH = config("FFMPEG_PATH", default="/usr/bin/ffmpeg")
+FFPROBE_PATH = config("FFPROBE_PATH", default="/usr/bin/ffprobe")
+
+# Celery
+CELERY_BROKER_URL = config("CELERY_BROKER_URL", default="redis://localhost:6379/0")
+CELERY_RESULT_BACKEND = config(
+    "CELERY_RESULT_BACKEND", default="redis://localhost:6379/0"
+)
+
+# Événements temps réel des dashboards (SSE, servis par livemanager.asgi)
+EVENTS_REDIS_URL = config("EVENTS_REDIS_URL", default=CELERY_BROKER_URL)
+SSE_KEEPALIVE = 15  # secondes entre deux commentaires de maintien
+
+# Cache partagé (Redis en production, voir env.example): fragments de pages
+# par utilisateur, statistiques admin. Sans CACHE_URL (tests, développement),
+# cache propre au processus
+CACHE_URL = config("CACHE_URL", default="locmem://")
+if CACHE_URL.startswith("locmem://"):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": "livemanager",
+            "OPTIONS": {"socket_connect_timeout": 1, "socket_timeout": 1},
+        }
+    }
+FRAGMENT_CACHE_TTL = config("FRAGMENT_CACHE_TTL", default=300, cast=int)
+
+# Lives par page du dashboard utilisateur (pagination par curseur)
+DASHBOARD_PAGE_SIZE = config("DASHBOARD_PAGE_SIZE", default=25, cast=int)
+
+# Dashboard admin: durée de cache des compteurs, utilisateurs par page
+ADMIN_STATS_TTL = config("ADMIN_STATS_TTL", default=30, cast=int)
+ADMIN_USERS_PAGE_SIZE = config("ADMIN_USERS_PAGE_SIZE", default=50, cast=int)
+
+# Les transcodages partent sur une file dédiée, consommée par un worker
+# à concurrence bornée pour ne pas affamer les lives en cours.
+CELERY_TASK_ROUTES = {
+    "streams.tasks.prepare_stream_rendition": {"queue": "transcode"},
+}
+# Tâches longues: un seul message réservé à la fois par processus.
+# Acquittement tardif pour les tâches courtes; prepare_stream_rendition
+# l'annule, ses encodages dépassant le visibility_timeout ci-dessous.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+
+# Lives programmés: une tâche avec eta est envoyée pour ceux qui démarrent
+# dans l'horizon; un balayage peu fréquent planifie les suivants et rattrape
+# les tâches perdues (celery beat). L'horizon reste sous le visibility_timeout
+# de Redis, sans quoi les tâches en attente seraient redistribuées.
+SCHEDULE_HORIZON = config("SCHEDULE_HORIZON", default=1800, cast=int)  # secondes
+SCHEDULE_SWEEP_INTERVAL = config("SCHEDULE_SWEEP_INTERVAL", default=300, cast=int)
+# Admission des lives programmés avant leur heure (cache, test RTMP, commande)
+SCHEDULE_PREWARM = config("SCHEDULE_PREWARM", default=60, cast=int)  # secondes
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": 2 * SCHEDULE_HORIZON,
+    "socket_connect_timeout": 2,
+}
+
+# Redis indisponible: l'envoi d'une tâche depuis une vue échoue en quelques
+# secondes au lieu de ~20 s (20 reconnexions du backend de résultats). Les
+# vues se rabattent alors sur le superviseur ou l'encodage direct.
+CELERY_BROKER_CONNECTION_TIMEOUT = 2
+CELERY_TASK_PUBLISH_RETRY_POLICY = {
+    "max_retries": 1,
+    "interval_start": 0,
+    "interval_step": 0.5,
+    "interval_max": 0.5,
+}
+CELERY_REDIS_SOCKET_CONNECT_TIMEOUT = 2
+CELERY_RESULT_BACKEND_TRANSPORT_OPTIONS = {
+    "retry_policy": {
+        "max_retries": 2,
+        "interval_start": 0,
+        "interval_step": 0.5,
+        "interval_max": 0.5,
+    },
+}
+CELERY_BEAT_SCHEDULE = {
+    "check-scheduled-lives": {
+        "task": "streams.tasks.check_scheduled_lives",
+        "schedule": SCHEDULE_SWEEP_INTERVAL,
+    },
+}
+
+# Rendu sans progression depuis ce délai (worker arrêté en plein encodage,
+# tâche acquittée à la réception): il est renvoyé sur la file ``transcode``.
+# La concurrence de cette file est fixée au lancement du worker (-c).
+TRANSCODE_STALE_TIMEOUT = config("TRANSCODE_STALE_TIMEOUT", default=1800, cast=int)
+CELERY_BEAT_SCHEDULE["requeue-stale-renditions"] = {
+    "task": "streams.tasks.requeue_stale_renditions",
+    "schedule": SCHEDULE_SWEEP_INTERVAL,
+}
+
+# Superviseur FFmpeg (python manage.py run_supervisor)
+SUPERVISOR_POLL_INTERVAL = config("SUPERVISOR_POLL_INTERVAL", default=1.0, cast=float)
+SUPERVISOR_MAX_RESTARTS = config("SUPERVISOR_MAX_RESTARTS", default=5, cast=int)
+SUPERVISOR_BACKOFF_BASE = 2.0  # Délai de relance: base ** tentative (secondes)
+SUPERVISOR_BACKOFF_MAX = 60.0
+SUPERVISOR_STABLE_UPTIME = 60.0  # Au-delà, le compteur de relances repart à zéro
+SUPERVISOR_STOP_TIMEOUT = 10.0  # Secondes entre SIGTERM et SIGKILL à l'arrêt
+
+# Télémétrie des lives (mesures -progress enregistrées par le superviseur)
+HEALTH_SAMPLE_INTERVAL = config("HEALTH_SAMPLE_INTERVAL", default=10.0, cast=float)
+HEALTH_RETENTION = config("HEALTH_RETENTION", default=3600, cast=int)  # secondes
+HEALTH_PRUNE_INTERVAL = config("HEALTH_PRUNE_INTERVAL", default=300, cast=int)
+CELERY_BEAT_SCHEDULE["prune-health-samples"] = {
+    "task": "streams.tasks.prune_health_samples",
+    "schedule": HEALTH_PRUNE_INTERVAL,
+}
+
+# Contrôle d'admission: coûts CPU en % d'un cœur
+ADMISSION_MAX_UTILIZATION = config(
+    "ADMISSION_MAX_UTILIZATION", default=0.85, cast=float
+)  # Part des cœurs utilisable par les lives
+ADMISSION_MAX_QUEUE = config("ADMISSION_MAX_QUEUE", default=100, cast=int)
+ADMISSION_DEFAULT_ENCODE_COST = 100.0  # Avant la première mesure d'un profil
+ADMISSION_DEFAULT_COPY_COST = 5.0
+ADMISSION_CPU_WARMUP = 30.0  # Secondes ignorées après le démarrage d'un live
+ADMISSION_CPU_SMOOTHING = 0.2  # Poids de la nouvelle mesure (moyenne glissante)
+
+# Nœuds de diffusion: chaque serveur lance un superviseur et un worker
+# Celery sur la file "node.<nom>" (arrêts routés vers le bon serveur)
+STREAM_NODE_NAME = config(
+    "STREAM_NODE_NAME", default=socket.gethostname().split(".")[0]
+)
+NODE_HEARTBEAT_INTERVAL = 5.0  # secondes entre deux battements de cœur
+NODE_HEARTBEAT_TIMEOUT = config("NODE_HEARTBEAT_TIMEOUT", default=30, cast=int)
@@ -7,14 +7,20 @@ import os
 import sys
 import django
 import psutil
-from django.db import transaction
 
 # Configuration Django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "livemanager.settings")
 django.setup()
 
 # Import après django.setup() pour éviter les erreurs de configuration
+from django.conf import settings  # noqa: E402
 from streams.models import Live  # noqa: E402
+from streams.states import transition  # noqa: E402
+
+
+def local_running_lives():
+    """Lives en cours sur ce nœud: les PID des autres nœuds n'ont pas de sens ici."""
+    return Live.objects.filter(node__name=settings.STREAM_NODE_NAME, status="running")
 
 
 def list_ffmpeg_processes():
@@ -36,9 +42,12 @@ def check_live_processes():
     """Vérifie la cohérence entre les lives en base et les processus FFmpeg."""
     print("\n📊 Vérification de la cohérence des lives...")
 
-    # Lives en cours dans la base
-    running_lives = Live.objects.filter(status="running")
-    print(f"Lives en cours dans la base: {running_lives.count()}")
+    # Lives en cours sur ce nœud dans la base
+    running_lives = local_running_lives()
+    print(
+        f"Lives en cours sur le nœud {settings.STREAM_NODE_NAME}: "
+        f"{running_lives.count()}"
+    )
 
     for live in running_lives:
         print(f"  - Live {live.id}: {live.title} (PID: {live.ffmpeg_pid})")
@@ -51,19 +60,13 @@ def check_live_processes():
                     print(f"    ✅ Processus {live.ffmpeg_pid} en cours")
                 else:
                     print(f"    ❌ Processus {live.ffmpeg_pid} arrêté")
-                    # Marquer le live comme terminé
-                    with transaction.atomic():
-                        live.status = "completed"
-                        live.ffmpeg_pid = None
-                        live.save()
+                    # Marquer le live comme terminé (s'il est toujours en cours)
+                    transition(live, "completed", ["running"], ffmpeg_pid=None)
                     print(f"    🔄 Live {live.id} marqué comme terminé")
             except psutil.NoSuchProcess:
                 print(f"    ❌ Processus {live.ffmpeg_pid} n'existe pas")
-                # Marquer le live comme terminé
-                with transaction.atomic():
-                    live.status = "completed"
-                    live.ffmpeg_pid = None
-                    live.save()
+                # Marquer le live comme terminé (s'il est toujours en cours)
+                transition(live, "completed", ["running"], ffmpeg_pid=None)
                 print(f"    🔄 Live {live.id} marqué comme terminé")
 
 
@@ -72,7 +75,7 @@ def kill_orphan_processes():
     print("\n🧹 Nettoyage des processus orphelins...")
 
     ffmpeg_processes = list_ffmpeg_processes()
-    running_lives = Live.objects.filter(status="running")
+    running_lives = local_running_lives()
     running_pids = [live.ffmpeg_pid for live in running_lives if live.ffmpeg_pid]
 
     orphan_count = 0
@@ -105,12 +108,9 @@ def kill_all_ffmpeg():
 
     print(f"  ✅ {killed_count} processus FFmpeg supprimés")
 
-    # Marquer tous les lives comme terminés
-    with transaction.atomic():
-        Live.objects.filter(status="running").update(
-            status="completed", ffmpeg_pid=None
-        )
-    print("  🔄 Tous les lives marqués comme terminés")
+    # Marquer les lives de ce nœud comme terminés
+    transition(local_running_lives(), "completed", ["running"], ffmpeg_pid=None)
+    print(f"  🔄 Lives du nœud {settings.STREAM_NODE_NAME} marqués comme terminés")
 
 
 def main():
@@ -1,6 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Live
+from . import bulk
+from .models import User, Live, EncoderProfile, StreamNode, VideoAsset
+from .tasks import schedule_live
 
 
 @admin.register(User)
@@ -36,24 +38,133 @@ class LiveAdmin(admin.ModelAdmin):
         "title",
         "user",
         "status",
+        "node",
+        "delivery_mode",
         "is_scheduled",
         "scheduled_at",
         "created_at",
     )
-    list_filter = ("status", "is_scheduled", "created_at")
+    list_filter = ("status", "node", "delivery_mode", "is_scheduled", "created_at")
     search_fields = ("title", "user__username", "user__email")
     ordering = ("-created_at",)
-    readonly_fields = ("created_at", "updated_at", "ffmpeg_pid")
+    readonly_fields = (
+        "created_at",
+        "updated_at",
+        "node",
+        "delivery_mode",
+        "ffmpeg_pid",
+        "stream_file",
+        "start_at",
+    )
+    filter_horizontal = ("extra_stream_keys",)
+    actions = ("start_lives", "stop_lives", "restart_lives")
 
     fieldsets = (
         (
             "Informations générales",
-            {"fields": ("user", "title", "video_file", "stream_key")},
+            {
+                "fields": (
+                    "user",
+                    "title",
+                    "video_file",
+                    "stream_file",
+                    "stream_key",
+                    "extra_stream_keys",
+                    "encoder_profile",
+                )
+            },
         ),
-        ("Programmation", {"fields": ("is_scheduled", "scheduled_at")}),
-        ("Statut", {"fields": ("status", "ffmpeg_pid")}),
+        ("Programmation", {"fields": ("is_scheduled", "scheduled_at", "start_at")}),
+        ("Statut", {"fields": ("status", "delivery_mode", "node", "ffmpeg_pid")}),
         (
             "Métadonnées",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
         ),
     )
+
+    @admin.action(description="Démarrer les lives sélectionnés")
+    def start_lives(self, request, queryset):
+        count = bulk.start_lives(queryset)
+        self.message_user(request, f"{count} live(s) en file de démarrage.")
+
+    @admin.action(description="Arrêter les lives sélectionnés")
+    def stop_lives(self, request, queryset):
+        count = bulk.stop_lives(queryset)
+        self.message_user(request, f"{count} live(s) en cours d'arrêt.")
+
+    @admin.action(description="Relancer les lives sélectionnés")
+    def restart_lives(self, request, queryset):
+        count = bulk.restart_lives(queryset)
+        self.message_user(request, f"{count} live(s) relancé(s).")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Horaire modifié: la tâche de démarrage est remplacée
+        if {"is_scheduled", "scheduled_at", "status"} & set(form.changed_data):
+            try:
+                schedule_live(obj)
+            except Exception as e:
+                self.message_user(
+                    request,
+                    f"Démarrage programmé non planifié: {e}",
+                    level=messages.WARNING,
+                )
+
+
+@admin.register(EncoderProfile)
+class EncoderProfileAdmin(admin.ModelAdmin):
+    """Configuration admin pour les profils d'encodage."""
+
+    list_display = (
+        "name",
+        "slug",
+        "video_codec",
+        "width",
+        "height",
+        "fps",
+        "video_bitrate",
+        "audio_codec",
+        "is_default",
+    )
+    list_filter = ("video_codec", "audio_codec", "is_default")
+    search_fields = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+
+
+@admin.register(StreamNode)
+class StreamNodeAdmin(admin.ModelAdmin):
+    """Configuration admin pour les nœuds de diffusion."""
+
+    list_display = (
+        "name",
+        "host",
+        "capacity",
+        "current_load",
+        "last_heartbeat",
+        "is_active",
+    )
+    list_filter = ("is_active",)
+    search_fields = ("name", "host")
+    readonly_fields = ("capacity", "current_load", "last_heartbeat", "created_at")
+
+
+@admin.register(VideoAsset)
+class VideoAssetAdmin(admin.ModelAdmin):
+    """Configuration admin pour les vidéos partagées."""
+
+    list_display = (
+        "sha256",
+        "size",
+        "ref_count",
+        "duration",
+        "video_codec",
+        "width",
+        "height",
+        "audio_codec",
+        "probed_at",
+    )
+    list_filter = ("video_codec", "audio_codec", "is_vfr")
+    search_fields = ("sha256", "file")
+    readonly_fields = [
+        field.name for field in VideoAsset._meta.fields if field.name != "id"
+    ]
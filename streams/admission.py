@@ -0,0 +1,149 @@
+"""
+Contrôle d'admission et placement des lives sur les nœuds de diffusion.
+
+Chaque nœud (``StreamNode``) annonce sa capacité et sa charge via le
+battement de cœur de son superviseur. Un démarrage réserve le coût CPU de
+son profil d'encodage (mesuré par les superviseurs, voir
+``EncoderProfile.measured_cpu``) sur le nœud le moins chargé qui peut
+l'accueillir; si aucun ne le peut, le live attend en file (``queued``)
+qu'un superviseur l'admette.
+
+La capacité est revérifiée sous verrou du nœud choisi (voir ``place``):
+requêtes web, actions groupées et superviseurs de tous les nœuds peuvent
+admettre en même temps sans dépasser la capacité d'un nœud.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import ffmpeg, states
+from .models import Live, StreamHealthSample, StreamNode
+
+# Statuts qui consomment de la capacité
+ACTIVE_STATUSES = ["starting", "running"]
+
+
+def estimate_cost(live):
+    """Coût CPU d'un live (% d'un cœur): mesuré, sinon valeur par défaut."""
+    profile = ffmpeg.effective_profile(live)
+    if profile.measured_cpu:
+        return profile.measured_cpu
+    if profile.is_passthrough:
+        return settings.ADMISSION_DEFAULT_COPY_COST
+    return settings.ADMISSION_DEFAULT_ENCODE_COST
+
+
+def available_nodes():
+    """Nœuds actifs dont le superviseur a donné signe de vie récemment."""
+    since = timezone.now() - timedelta(seconds=settings.NODE_HEARTBEAT_TIMEOUT)
+    return StreamNode.objects.filter(is_active=True, last_heartbeat__gte=since)
+
+
+def committed_cost(node):
+    """Somme des coûts réservés par les lives actifs d'un nœud."""
+    total = Live.objects.filter(node=node, status__in=ACTIVE_STATUSES).aggregate(
+        total=Sum("admitted_cost")
+    )["total"]
+    return total or 0.0
+
+
+def has_lagging_streams(node):
+    """Vrai si un live du nœud n'encode plus en temps réel (vitesse < 1.0x)."""
+    since = timezone.now() - timedelta(seconds=2 * settings.HEALTH_SAMPLE_INTERVAL)
+    return StreamHealthSample.objects.filter(
+        created_at__gte=since,
+        speed__lt=1.0,
+        live__status="running",
+        live__node=node,
+    ).exists()
+
+
+def free_capacity(node):
+    """Capacité restante d'un nœud: réserve et charge réelle sont déduites."""
+    return node.capacity - max(committed_cost(node), node.current_load)
+
+
+def choose_node(cost):
+    """Nœud le moins chargé pouvant accueillir un live de ce coût (ou None)."""
+    best, best_free = None, None
+    for node in available_nodes():
+        if has_lagging_streams(node):
+            continue  # Ne pas dégrader les lives déjà en retard
+        free = free_capacity(node)
+        if free >= cost and (best is None or free > best_free):
+            best, best_free = node, free
+    return best
+
+
+def admit(live, cost, node):
+    """Réserve la capacité du nœud et confie le live à son superviseur."""
+    return states.transition(
+        live, "starting", ["pending", "queued"], admitted_cost=cost, node=node
+    )
+
+
+def place(live, cost, attempts=3):
+    """Admet un live sur le nœud le moins chargé qui peut l'accueillir.
+
+    Le nœud choisi est verrouillé et sa capacité revérifiée avant la
+    réservation; s'il a été rempli entre-temps, un autre nœud est choisi.
+    Retourne le résultat de ``admit`` (0 si le live a été pris en charge
+    par ailleurs), ou None si aucun nœud n'a la capacité.
+    """
+    for _ in range(attempts):
+        node = choose_node(cost)
+        if node is None:
+            return None
+        with transaction.atomic():
+            # UPDATE sans effet plutôt que SELECT FOR UPDATE: verrou de ligne
+            # sous PostgreSQL et verrou d'écriture sous SQLite (ignoré par
+            # select_for_update), pris avant de relire la charge du nœud
+            StreamNode.objects.filter(id=node.id).update(capacity=F("capacity"))
+            node.refresh_from_db(fields=["capacity", "current_load"])
+            if free_capacity(node) >= cost:
+                return admit(live, cost, node)
+    return None
+
+
+def request_start(live, start_at=None):
+    """Demande le démarrage d'un live.
+
+    Avec ``start_at``, le live est admis en avance: le superviseur de son
+    nœud prépare FFmpeg et le lance à cette heure exacte. Retourne
+    ``"starting"`` si le live est admis, ``"queued"`` s'il attend de la
+    capacité, ``None`` si la file d'attente est pleine, ou le statut courant
+    si un démarrage concurrent l'a déjà pris en charge.
+    """
+    cost = estimate_cost(live)
+    Live.objects.filter(id=live.id, status="pending").update(start_at=start_at)
+    queue = Live.objects.filter(status="queued").exclude(id=live.id)
+
+    # Premier arrivé, premier servi: ne pas doubler les lives en file
+    if not queue.exists() and place(live, cost):
+        return "starting"
+
+    if queue.count() >= settings.ADMISSION_MAX_QUEUE:
+        return None
+
+    if states.transition(live, "queued", ["pending"]):
+        return "queued"
+    return Live.objects.filter(id=live.id).values_list("status", flat=True).first()
+
+
+def admit_queued():
+    """Admet les lives en file, dans l'ordre, tant qu'un nœud peut les accueillir."""
+    admitted = []
+    queued = Live.objects.filter(status="queued").select_related(
+        "stream_key__encoder_profile", "encoder_profile"
+    )
+    for live in queued.order_by("updated_at"):
+        placed = place(live, estimate_cost(live))
+        if placed is None:
+            break
+        if placed:
+            admitted.append(live.id)
+    return admitted
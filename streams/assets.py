@@ -0,0 +1,155 @@
+"""
+Stockage des vidéos adressé par contenu.
+
+Une vidéo est enregistrée une seule fois sous ``videos/<sha256><ext>``
+(``VideoAsset``), quel que soit le nombre de lives ou d'utilisateurs qui
+l'envoient. Un nouvel envoi d'un contenu déjà connu réutilise le fichier
+existant et ses rendus; le client peut même éviter l'envoi en vérifiant
+l'empreinte au préalable (vue ``check_video_asset``).
+"""
+
+import glob
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from . import ffmpeg
+from .models import Live, VideoAsset
+
+HASH_READ_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """Empreinte SHA-256 d'un fichier, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def asset_filename(sha256, filename):
+    _, ext = os.path.splitext(filename)
+    return f"{sha256}{ext.lower() or '.mp4'}"
+
+
+def find(sha256, size=None):
+    """Vidéo déjà stockée pour cette empreinte (et cette taille), sinon None."""
+    assets = VideoAsset.objects.filter(sha256=sha256)
+    if size is not None:
+        assets = assets.filter(size=size)
+    asset = assets.first()
+    if asset and default_storage.exists(asset.file.name):
+        return asset
+    return None
+
+
+def _save_or_existing(asset):
+    """Enregistre la vidéo; si un envoi concurrent l'a devancé, garde la sienne."""
+    try:
+        with transaction.atomic():
+            asset.save()
+    except IntegrityError:
+        asset.file.delete(save=False)
+        return VideoAsset.objects.get(sha256=asset.sha256)
+    return asset
+
+
+def store_uploaded_file(uploaded_file, sha256):
+    """Vidéo correspondant à un fichier reçu, stockée s'il est nouveau."""
+    asset = find(sha256, uploaded_file.size)
+    if asset:
+        uploaded_file.close()  # Doublon: le fichier reçu est supprimé
+        return asset
+
+    asset = VideoAsset(sha256=sha256, size=uploaded_file.size)
+    # Renommé depuis le fichier temporaire de ``videos/`` (voir uploadhandlers)
+    asset.file.save(
+        asset_filename(sha256, uploaded_file.name), uploaded_file, save=False
+    )
+    return _save_or_existing(asset)
+
+
+def store_path(path, filename):
+    """Vidéo correspondant à un fichier déjà sur le disque (upload reprenable).
+
+    Le fichier est renommé dans ``videos/`` (même disque, sans copie), ou
+    supprimé si ce contenu est déjà stocké.
+    """
+    sha256 = file_sha256(path)
+    size = os.path.getsize(path)
+    asset = find(sha256, size)
+    if asset:
+        os.remove(path)
+        return asset
+
+    name = default_storage.get_available_name(
+        os.path.join("videos", asset_filename(sha256, filename))
+    )
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(path, target)
+    if settings.FILE_UPLOAD_PERMISSIONS is not None:
+        os.chmod(target, settings.FILE_UPLOAD_PERMISSIONS)
+    return _save_or_existing(VideoAsset(sha256=sha256, size=size, file=name))
+
+
+def attach(live, asset):
+    """Fait pointer un live (non encore enregistré) sur une vidéo stockée."""
+    live.video_asset = asset
+    # Remplace aussi le fichier reçu par le formulaire, déjà stocké ou supprimé
+    live.video_file = asset.file.name
+
+
+def probe(asset):
+    """Analyse la vidéo avec ffprobe une seule fois; le résultat reste en
+    cache sur l'asset (``probed_at``, ``probe_error``)."""
+    if asset.probed_at:
+        return asset
+    try:
+        info = ffmpeg.probe_media(asset.file.path)
+        info["probe_error"] = ""
+    except ValueError as e:
+        info = {"probe_error": str(e)}
+    info["probed_at"] = timezone.now()
+    VideoAsset.objects.filter(id=asset.id).update(**info)
+    for field, value in info.items():
+        setattr(asset, field, value)
+    return asset
+
+
+def retain(asset_id):
+    VideoAsset.objects.filter(id=asset_id).update(ref_count=F("ref_count") + 1)
+
+
+def release(asset_id):
+    """Retire une référence; la vidéo et ses rendus sont supprimés à zéro.
+
+    La suppression est conditionnelle et faite sous verrou de la ligne: un
+    live qui reprend la vidéo au même moment (``attach`` puis ``retain``)
+    l'emporte, et ses fichiers sont conservés.
+    """
+    VideoAsset.objects.filter(id=asset_id, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1
+    )
+    unused = VideoAsset.objects.filter(id=asset_id, ref_count=0).exclude(
+        Exists(Live.objects.filter(video_asset=OuterRef("pk")))
+    )
+    with transaction.atomic():
+        asset = unused.select_for_update().first()
+        if asset is None:
+            return False
+        deleted, _ = unused.delete()
+    if not deleted:
+        return False
+
+    asset.file.delete(save=False)
+    pattern = os.path.join(settings.MEDIA_ROOT, asset.rendition_name("*"))
+    for rendition in glob.glob(pattern):
+        os.remove(rendition)
+    return True
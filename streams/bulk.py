@@ -0,0 +1,96 @@
+"""
+Opérations groupées sur les lives (dashboard admin, actions de l'admin Django).
+
+Chaque opération applique sa transition d'état en une seule requête UPDATE
+sur tout l'ensemble (voir ``states``); le travail sur les processus est
+ensuite réparti: les superviseurs des nœuds admettent et arrêtent leurs
+lives en parallèle, et l'arrêt est envoyé en un message par nœud.
+"""
+
+from django.conf import settings
+
+from . import states
+from .models import Live
+from .tasks import dispatch_stops
+
+
+def filter_lives(data):
+    """Lives désignés par une requête: ``ids`` et/ou ``user``, ``node``,
+    ``status``. Retourne None si aucun critère n'est donné."""
+    lives = Live.objects.all()
+    criteria = False
+    ids = [value for value in data.getlist("ids") if value.isdigit()]
+    if ids:
+        lives = lives.filter(id__in=ids)
+        criteria = True
+    for field, lookup in (
+        ("user", "user__username"),
+        ("node", "node__name"),
+        ("status", "status"),
+    ):
+        value = data.get(field)
+        if value:
+            lives = lives.filter(**{lookup: value})
+            criteria = True
+    return lives if criteria else None
+
+
+def _admissible(lives, statuses):
+    """Ids des lives démarrables parmi ``lives`` (statut dans ``statuses``),
+    dans l'ordre de création et dans la limite des places libres de la file."""
+    slots = settings.ADMISSION_MAX_QUEUE - Live.objects.filter(status="queued").count()
+    return list(
+        lives.filter(
+            status__in=statuses, user__is_approved=True, stream_key__isnull=False
+        )
+        .order_by("created_at")
+        .values_list("id", flat=True)[: max(slots, 0)]
+    )
+
+
+def start_lives(lives):
+    """Met en file d'admission les lives démarrables, dans l'ordre de création.
+
+    Les superviseurs les admettent dès leur prochain cycle, selon la capacité
+    de leur nœud; la limite ``ADMISSION_MAX_QUEUE`` est respectée.
+    """
+    ids = _admissible(lives, ["pending"])
+    return states.transition(
+        Live.objects.filter(id__in=ids), "queued", ["pending"], start_at=None
+    )
+
+
+def stop_lives(lives):
+    """Arrête les lives en file, en démarrage ou en cours."""
+    completed = states.transition(lives, "completed", ["queued"])
+    ids = list(
+        lives.filter(status__in=["starting", "running"]).values_list("id", flat=True)
+    )
+    stopping = states.transition(
+        Live.objects.filter(id__in=ids), "stopping", ["starting", "running"]
+    )
+    if stopping:
+        try:
+            dispatch_stops(ids)
+        except Exception as e:
+            # Les superviseurs arrêtent de toute façon les lives ``stopping``
+            print(f"[DEBUG] Arrêts groupés non transmis: {e}")
+    return completed + stopping
+
+
+def restart_lives(lives):
+    """Relance les lives terminés ou échoués.
+
+    Seuls les lives qui entrent dans la file d'admission changent de statut;
+    les autres (propriétaire non approuvé, sans clé, file pleine) restent
+    terminés ou échoués.
+    """
+    ids = _admissible(lives, ["completed", "failed"])
+    states.transition(
+        Live.objects.filter(id__in=ids), "pending", ["completed", "failed"]
+    )
+    return start_lives(Live.objects.filter(id__in=ids))
+
+
+# Actions groupées: nom → fonction (retourne le nombre de lives traités)
+ACTIONS = {"start": start_lives, "stop": stop_lives, "restart": restart_lives}
@@ -0,0 +1,86 @@
+"""
+Événements temps réel des lives (Server-Sent Events).
+
+Les changements de statut, la santé des lives et la progression des
+préparations sont publiés sur le canal Redis de leur propriétaire
+(``live-events:<user_id>``). La vue ``live_events``, servie par
+``livemanager.asgi``, les relaie au navigateur sur une connexion par
+dashboard ouvert, au lieu de recharger la page pour suivre les lives.
+Une publication impossible (Redis indisponible) ne fait jamais échouer
+l'opération qui l'a déclenchée.
+"""
+
+import json
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from .models import Live
+
+_client = None
+
+
+def channel(user_id):
+    return f"live-events:{user_id}"
+
+
+def _redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.EVENTS_REDIS_URL, socket_connect_timeout=1, socket_timeout=1
+        )
+    return _client
+
+
+def publish_many(messages):
+    """Publie des événements ``(user_id, event, data)`` en un seul aller-retour."""
+    if not messages:
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for user_id, event, data in messages:
+            pipe.publish(channel(user_id), json.dumps({"event": event, "data": data}))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"[DEBUG] Événements non publiés: {e}")
+
+
+def publish(user_id, event, data):
+    publish_many([(user_id, event, data)])
+
+
+def publish_status(lives, status):
+    """Nouveau statut de lives ``(live_id, user_id)``."""
+    label = dict(Live.STATUS_CHOICES).get(status, status)
+    publish_many(
+        [
+            (user_id, "status", {"live_id": live_id, "status": status, "label": label})
+            for live_id, user_id in lives
+        ]
+    )
+
+
+def format_event(message):
+    """Message Redis → bloc SSE ``event:``/``data:``."""
+    payload = json.loads(message["data"])
+    return f"event: {payload['event']}\ndata: {json.dumps(payload['data'])}\n\n"
+
+
+async def stream(user_id):
+    """Flux SSE des événements d'un utilisateur, avec commentaires de maintien."""
+    client = redis.asyncio.Redis.from_url(settings.EVENTS_REDIS_URL)
+    pubsub = client.pubsub()
+    await pubsub.subscribe(channel(user_id))
+    try:
+        # Délai de reconnexion du navigateur après une coupure
+        yield "retry: 3000\n\n"
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=settings.SSE_KEEPALIVE
+            )
+            yield format_event(message) if message else ": keepalive\n\n"
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
@@ -0,0 +1,509 @@
+"""
+Construction et lancement des commandes FFmpeg de LiveManager.
+
+Toutes les commandes (diffusion, rendu hors ligne) passent par ce module
+afin que les vues et les tâches Celery partagent les mêmes paramètres,
+décrits par les profils d'encodage (``EncoderProfile``).
+"""
+
+import hashlib
+import json
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from .models import EncoderProfile
+
+# Profil utilisé si aucun profil par défaut n'est configuré en base
+FALLBACK_PROFILE = EncoderProfile(
+    name="360p économique",
+    slug="low-360p",
+    video_codec="libx264",
+    preset="ultrafast",
+    width=640,
+    height=360,
+    video_bitrate=500,
+    maxrate=800,
+    bufsize=1200,
+    gop=60,
+    audio_codec="aac",
+    audio_bitrate=96,
+)
+
+
+# Limites des plateformes pour relayer une source sans réencodage:
+# débit total (kbps), hauteur d'image, intervalle entre images clés (s)
+PLATFORM_LIMITS = {
+    "YouTube": {"max_bitrate": 51000, "max_height": 2160, "max_keyframe": 4},
+    "Twitch": {"max_bitrate": 6000, "max_height": 1080, "max_keyframe": 2},
+    "Facebook": {"max_bitrate": 8000, "max_height": 1080, "max_keyframe": 2},
+    "Instagram": {"max_bitrate": 4000, "max_height": 1920, "max_keyframe": 2},
+    "TikTok": {"max_bitrate": 6000, "max_height": 1920, "max_keyframe": 2},
+}
+DEFAULT_PLATFORM_LIMITS = {"max_bitrate": 6000, "max_height": 1080, "max_keyframe": 4}
+
+# Sources relayables en FLV avec ``-c copy``
+REMUX_CONTAINERS = ("mp4", "mov", "flv", "matroska")
+REMUX_VIDEO_PROFILES = ("Baseline", "Constrained Baseline", "Main", "High")
+REMUX_SAMPLE_RATES = (44100, 48000)
+# Un GOP de 120 images à 29.97 i/s dure 4.004s: marge sur les images clés
+KEYFRAME_TOLERANCE = 1.05
+
+
+def get_ffmpeg_path():
+    """Chemin de l'exécutable FFmpeg."""
+    return getattr(settings, "FFMPEG_PATH", "ffmpeg")
+
+
+def get_ffprobe_path():
+    """Chemin de l'exécutable ffprobe."""
+    return getattr(settings, "FFPROBE_PATH", "ffprobe")
+
+
+def resolve_profile(live):
+    """Profil du live, sinon celui de sa clé, sinon le profil par défaut."""
+    if live.encoder_profile_id:
+        return live.encoder_profile
+    if live.stream_key_id and live.stream_key.encoder_profile_id:
+        return live.stream_key.encoder_profile
+    return EncoderProfile.objects.filter(is_default=True).first() or FALLBACK_PROFILE
+
+
+def can_remux(live):
+    """Vrai si la source peut être diffusée telle quelle (``-c copy``).
+
+    Il faut une vidéo analysée (voir ``assets.probe``) en H.264/AAC à
+    fréquence fixe, dont le débit, la résolution et l'intervalle entre
+    images clés respectent les limites de toutes les destinations. Un
+    profil choisi explicitement pour le live est toujours respecté.
+    """
+    asset = live.video_asset
+    if live.encoder_profile_id or asset is None or not asset.probed_at:
+        return False
+    if asset.probe_error or asset.is_vfr:
+        return False
+    if not any(name in asset.container for name in REMUX_CONTAINERS):
+        return False
+    if asset.video_codec != "h264" or asset.video_profile not in REMUX_VIDEO_PROFILES:
+        return False
+    if asset.audio_codec != "aac" or not asset.has_audio:
+        return False
+    if asset.audio_sample_rate not in REMUX_SAMPLE_RATES:
+        return False
+    if not (asset.keyframe_interval and asset.bitrate_kbps and asset.height):
+        return False
+
+    for stream_key in live.get_destinations():
+        limits = PLATFORM_LIMITS.get(stream_key.platform, DEFAULT_PLATFORM_LIMITS)
+        if (
+            asset.bitrate_kbps > limits["max_bitrate"]
+            or asset.height > limits["max_height"]
+            or asset.keyframe_interval > limits["max_keyframe"] * KEYFRAME_TOLERANCE
+        ):
+            return False
+    return True
+
+
+def delivery_mode(live):
+    """Chemin de diffusion d'un live: copie de la source, rendu ou encodage."""
+    if live.delivery_mode == "remux":
+        return "remux"
+    if live.has_stream_file:
+        return "rendition"
+    return "transcode"
+
+
+def effective_profile(live):
+    """Profil réellement exécuté: copie si la source ou le rendu est relayé."""
+    if delivery_mode(live) != "transcode":
+        return EncoderProfile.objects.filter(slug="copy").first() or EncoderProfile(
+            name="Copie directe", slug="copy", video_codec="copy", audio_codec="copy"
+        )
+    return resolve_profile(live)
+
+
+def encoding_args(profile):
+    """Arguments de codec FFmpeg correspondant à un profil."""
+    args = []
+
+    if profile.video_codec == "none":
+        args += ["-vn"]
+    elif profile.video_codec == "copy":
+        args += ["-c:v", "copy"]
+    else:
+        args += ["-c:v", profile.video_codec, "-preset", profile.preset]
+        args += ["-pix_fmt", "yuv420p"]
+        if profile.video_bitrate:
+            args += ["-b:v", f"{profile.video_bitrate}k"]
+        if profile.maxrate:
+            args += ["-maxrate", f"{profile.maxrate}k"]
+        if profile.bufsize:
+            args += ["-bufsize", f"{profile.bufsize}k"]
+        if profile.width and profile.height:
+            args += ["-s", f"{profile.width}x{profile.height}"]
+        if profile.fps:
+            args += ["-r", str(profile.fps)]
+        if profile.gop:
+            # GOP fixe: le rendu peut ensuite être relayé en copie
+            args += ["-g", str(profile.gop), "-keyint_min", str(profile.gop)]
+            args += ["-sc_threshold", "0"]
+
+    if profile.audio_codec == "copy":
+        args += ["-c:a", "copy"]
+    else:
+        args += ["-c:a", profile.audio_codec, "-b:a", f"{profile.audio_bitrate}k"]
+        args += ["-ar", "44100"]
+
+    return args
+
+
+def encoding_key(profile):
+    """Empreinte courte des paramètres d'encodage d'un profil.
+
+    Deux lives d'une même vidéo encodés avec les mêmes paramètres partagent
+    le même rendu (voir ``VideoAsset.rendition_name``).
+    """
+    return hashlib.sha1(" ".join(encoding_args(profile)).encode()).hexdigest()[:12]
+
+
+def build_rendition_command(live, output_path, profile=None):
+    """Commande d'encodage unique de la vidéo en FLV prêt à diffuser."""
+    profile = profile or resolve_profile(live)
+    return (
+        [get_ffmpeg_path(), "-y", "-loglevel", "error", "-i", live.video_file.path]
+        + encoding_args(profile)
+        + ["-f", "flv", output_path]
+    )
+
+
+def tee_escape(url):
+    """Échappe une URL de destination pour la syntaxe du muxer ``tee``."""
+    for char in ("\\", "|", "'", "[", "]"):
+        url = url.replace(char, "\\" + char)
+    return url
+
+
+def output_args(rtmp_urls):
+    """Arguments de sortie: FLV direct, ou ``tee`` pour plusieurs destinations.
+
+    Avec ``tee``, un seul encodage alimente toutes les destinations;
+    ``onfail=ignore`` évite qu'une plateforme en échec coupe les autres.
+    """
+    if len(rtmp_urls) == 1:
+        return ["-f", "flv", rtmp_urls[0]]
+
+    outputs = "|".join(f"[f=flv:onfail=ignore]{tee_escape(url)}" for url in rtmp_urls)
+    return [
+        "-map",
+        "0:v?",
+        "-map",
+        "0:a?",
+        "-flags",
+        "+global_header",
+        "-f",
+        "tee",
+        outputs,
+    ]
+
+
+def input_path(live):
+    """Fichier lu par FFmpeg pour diffuser un live."""
+    if delivery_mode(live) == "rendition":
+        return live.stream_file.path
+    return live.video_file.path
+
+
+def check_rtmp_endpoint(url, timeout=5.0):
+    """Poignée de main RTMP (C0/C1 puis S0/S1) avec le serveur d'une clé.
+
+    Vérifie que le serveur d'ingestion est joignable et répond en RTMP
+    (TLS pour ``rtmps://``); la clé elle-même n'est validée qu'à la
+    publication. Lève ``OSError`` ou ``ValueError`` en cas d'échec.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("rtmp", "rtmps") or not parts.hostname:
+        raise ValueError(f"URL RTMP invalide: {parts.scheme}://{parts.hostname}")
+    port = parts.port or (443 if parts.scheme == "rtmps" else 1935)
+
+    with socket.create_connection((parts.hostname, port), timeout=timeout) as sock:
+        if parts.scheme == "rtmps":
+            context = ssl.create_default_context()
+            sock = context.wrap_socket(sock, server_hostname=parts.hostname)
+        # C0 (version 3) + C1 (horodatage, zéros, 1528 octets aléatoires)
+        sock.sendall(b"\x03" + bytes(8) + os.urandom(1528))
+        received = b""
+        while len(received) < 1537:
+            chunk = sock.recv(1537 - len(received))
+            if not chunk:
+                raise OSError("connexion fermée pendant la poignée de main RTMP")
+            received += chunk
+        if received[0] != 3:
+            raise ValueError(f"version RTMP inattendue: {received[0]}")
+
+
+def build_stream_command(live, rtmp_url=None):
+    """Commande de diffusion en boucle d'un live vers ses destinations RTMP.
+
+    Une source compatible (voir ``can_remux``) ou le rendu pré-encodé est
+    relayé avec ``-c copy``; sinon la source est encodée à la volée selon
+    le profil du live. Un seul processus alimente toutes les clés du live
+    (voir ``output_args``).
+    """
+    if rtmp_url:
+        rtmp_urls = [rtmp_url]
+    else:
+        rtmp_urls = [stream_key.key for stream_key in live.get_destinations()]
+
+    mode = delivery_mode(live)
+    if mode == "transcode":
+        codec_args = encoding_args(resolve_profile(live))
+    else:
+        codec_args = ["-c", "copy"]
+
+    return (
+        [get_ffmpeg_path(), "-re", "-stream_loop", "-1", "-i", input_path(live)]
+        + codec_args
+        + output_args(rtmp_urls)
+    )
+
+
+def process_group_kwargs():
+    """Options de création du processus FFmpeg dans son propre groupe,
+    pour pouvoir l'arrêter avec tous ses enfants (Windows et Linux)."""
+    if sys.platform.startswith("win"):
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def probe_duration(path):
+    """Retourne la durée de la vidéo en secondes via ffprobe (None si inconnue)."""
+    try:
+        result = subprocess.run(
+            [
+                get_ffprobe_path(),
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def _frame_rate(value):
+    """Convertit un débit d'images ffprobe (``30000/1001``) en nombre."""
+    num, _, den = (value or "").partition("/")
+    try:
+        num, den = float(num), float(den or 1)
+    except ValueError:
+        return None
+    return round(num / den, 3) if num and den else None
+
+
+def probe_keyframe_interval(path, window=60):
+    """Intervalle maximal (s) entre images clés sur le début de la vidéo."""
+    try:
+        result = subprocess.run(
+            [
+                get_ffprobe_path(),
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-skip_frame",
+                "nokey",
+                "-show_entries",
+                "frame=best_effort_timestamp_time",
+                "-of",
+                "csv=p=0",
+                "-read_intervals",
+                f"%+{window}",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    times = sorted(
+        value
+        for value in (_number(line.strip(",")) for line in result.stdout.split())
+        if value is not None
+    )
+    if len(times) < 2:
+        return None
+    return round(max(b - a for a, b in zip(times, times[1:])), 3)
+
+
+def probe_media(path):
+    """Analyse une vidéo avec ffprobe (conteneur, codecs, résolution...).
+
+    Retourne les champs de métadonnées de ``VideoAsset``. Lève ``ValueError``
+    si le fichier n'est pas une vidéo lisible.
+    """
+    try:
+        result = subprocess.run(
+            [
+                get_ffprobe_path(),
+                "-v",
+                "error",
+                "-print_format",
+                "json",
+                "-show_format",
+                "-show_streams",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ValueError(f"ffprobe indisponible: {e}")
+    if result.returncode != 0:
+        raise ValueError(result.stderr.strip()[-500:] or "ffprobe a échoué")
+    try:
+        data = json.loads(result.stdout)
+    except ValueError:
+        raise ValueError("Sortie ffprobe illisible")
+
+    streams = data.get("streams", [])
+    video = next(
+        (
+            stream
+            for stream in streams
+            if stream.get("codec_type") == "video"
+            and not stream.get("disposition", {}).get("attached_pic")
+        ),
+        None,
+    )
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if video is None and audio is None:
+        raise ValueError("Aucun flux audio ou vidéo")
+
+    container = data.get("format", {})
+    bitrate = _number(str(container.get("bit_rate", "")), cast=int)
+    info = {
+        "duration": _number(str(container.get("duration", ""))),
+        "container": container.get("format_name", "")[:100],
+        "bitrate_kbps": bitrate // 1000 if bitrate else None,
+    }
+    if video:
+        r_rate = _frame_rate(video.get("r_frame_rate"))
+        avg_rate = _frame_rate(video.get("avg_frame_rate"))
+        info.update(
+            video_codec=video.get("codec_name", ""),
+            video_profile=video.get("profile", "")[:50],
+            width=video.get("width"),
+            height=video.get("height"),
+            fps=avg_rate or r_rate,
+            # Débit d'images de base différent du débit moyen: fréquence variable
+            is_vfr=bool(r_rate and avg_rate and abs(r_rate - avg_rate) > 0.01 * r_rate),
+            keyframe_interval=probe_keyframe_interval(path),
+        )
+    if audio:
+        info.update(
+            audio_codec=audio.get("codec_name", ""),
+            audio_channels=audio.get("channels"),
+            audio_layout=audio.get("channel_layout", "")[:50],
+            audio_sample_rate=_number(str(audio.get("sample_rate", "")), cast=int),
+            audio_duration=_number(str(audio.get("duration", ""))),
+        )
+    return info
+
+
+def with_progress(command):
+    """Ajoute ``-progress pipe:1`` à une commande: FFmpeg écrit alors des blocs
+    ``clé=valeur`` sur stdout, terminés par une ligne ``progress=...``."""
+    return command[:1] + ["-progress", "pipe:1", "-nostats"] + command[1:]
+
+
+def _number(value, suffix="", cast=float):
+    value = value.strip()
+    if value.endswith(suffix):
+        value = value[: len(value) - len(suffix)]
+    try:
+        return cast(value)
+    except ValueError:
+        return None  # "N/A" au démarrage
+
+
+def parse_progress(block):
+    """Convertit un bloc ``-progress`` en mesures (fps, débit, vitesse...)."""
+    out_time_us = _number(block.get("out_time_us", ""), cast=int)
+    if out_time_us is None:
+        # Anciennes versions: ``out_time_ms`` est aussi en microsecondes
+        out_time_us = _number(block.get("out_time_ms", ""), cast=int)
+    return {
+        "fps": _number(block.get("fps", "")),
+        "bitrate_kbps": _number(block.get("bitrate", ""), "kbits/s"),
+        "speed": _number(block.get("speed", ""), "x"),
+        "drop_frames": _number(block.get("drop_frames", ""), cast=int) or 0,
+        "dup_frames": _number(block.get("dup_frames", ""), cast=int) or 0,
+        "out_time_ms": out_time_us // 1000 if out_time_us is not None else None,
+    }
+
+
+class ProgressParser:
+    """Assemble les lignes de ``-progress`` et garde la dernière mesure."""
+
+    def __init__(self):
+        self.block = {}
+        self.latest = None
+
+    def feed(self, line):
+        key, _, value = line.strip().partition("=")
+        if key == "progress":
+            self.latest = parse_progress(self.block)
+            self.block = {}
+        elif key:
+            self.block[key] = value
+
+
+def run_with_progress(command, duration=None, on_progress=None):
+    """Exécute FFmpeg en lisant sa sortie ``-progress`` et remonte le pourcentage.
+
+    ``on_progress`` est appelé avec un entier 0-100 à chaque changement.
+    Lève ``subprocess.CalledProcessError`` si FFmpeg échoue.
+    """
+    command = with_progress(command)
+
+    # stderr part dans un fichier pour ne jamais bloquer FFmpeg sur un pipe plein
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=stderr_file, text=True
+        )
+        last_percent = -1
+        for line in process.stdout:
+            key, _, value = line.strip().partition("=")
+            if key not in ("out_time_us", "out_time_ms") or not duration:
+                continue
+            try:
+                seconds = int(value) / 1_000_000
+            except ValueError:
+                continue
+            percent = min(100, int(seconds * 100 / duration))
+            if percent != last_percent and on_progress:
+                on_progress(percent)
+            last_percent = percent
+
+        returncode = process.wait()
+        if returncode != 0:
+            stderr_file.seek(0)
+            raise subprocess.CalledProcessError(
+                returncode, command, stderr=stderr_file.read()[-2000:]
+            )
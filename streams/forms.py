@@ -25,7 +25,7 @@ class StreamKeyForm(forms.ModelForm):
 
     class Meta:
         model = StreamKey
-        fields = ["name", "key", "platform", "is_active"]
+        fields = ["name", "key", "platform", "encoder_profile", "is_active"]
         widgets = {
             "name": forms.TextInput(
                 attrs={"class": "form-input", "placeholder": "Ex: YouTube Principal"}
@@ -48,6 +48,8 @@ class StreamKeyForm(forms.ModelForm):
         )
         self.fields["platform"].choices = platform_choices
         self.fields["platform"].widget.attrs.update({"class": "form-select"})
+        self.fields["encoder_profile"].empty_label = "Profil par défaut"
+        self.fields["encoder_profile"].widget.attrs.update({"class": "form-select"})
 
     def save(self, commit=True):
         stream_key = super().save(commit=False)
@@ -63,9 +65,18 @@ class LiveForm(forms.ModelForm):
 
     class Meta:
         model = Live
-        fields = ["title", "video_file", "stream_key", "is_scheduled", "scheduled_at"]
+        fields = [
+            "title",
+            "video_file",
+            "stream_key",
+            "extra_stream_keys",
+            "encoder_profile",
+            "is_scheduled",
+            "scheduled_at",
+        ]
         widgets = {
             "title": forms.TextInput(attrs={"class": "form-input"}),
+            "extra_stream_keys": forms.CheckboxSelectMultiple(),
             "scheduled_at": forms.DateTimeInput(
                 attrs={"class": "form-input", "type": "datetime-local"},
                 format="%Y-%m-%dT%H:%M",
@@ -84,8 +95,15 @@ class LiveForm(forms.ModelForm):
             self.fields["stream_key"].widget.attrs.update({"class": "form-select"})
             # Rendre le champ optionnel
             self.fields["stream_key"].required = False
+            # Destinations supplémentaires diffusées par le même encodage
+            self.fields["extra_stream_keys"].queryset = StreamKey.objects.filter(
+                user=self.user, is_active=True
+            )
 
-        self.fields["video_file"].widget.attrs.update({"class": "form-input"})
+        self.fields["encoder_profile"].empty_label = "Profil de la clé de diffusion"
+        self.fields["encoder_profile"].widget.attrs.update({"class": "form-select"})
+        if "video_file" in self.fields:
+            self.fields["video_file"].widget.attrs.update({"class": "form-input"})
         self.fields["is_scheduled"].widget.attrs.update({"class": "form-checkbox"})
 
     def clean(self):
@@ -93,6 +111,29 @@ class LiveForm(forms.ModelForm):
         is_scheduled = cleaned_data.get("is_scheduled")
         scheduled_at = cleaned_data.get("scheduled_at")
         stream_key = cleaned_data.get("stream_key")
+
+        self.check_video_file()
+
+        if is_scheduled and not scheduled_at:
+            raise forms.ValidationError(
+                "La date et heure de programmation sont requises pour "
+                "une diffusion programmée."
+            )
+
+        # Vérifier si l'utilisateur a des clés de streaming configurées
+        if self.user and not stream_key:
+            user_keys = StreamKey.objects.filter(user=self.user, is_active=True)
+            if not user_keys.exists():
+                raise forms.ValidationError(
+                    "Vous devez d'abord configurer au moins une clé de streaming "
+                    "dans votre profil avant de créer un live. "
+                    "Allez dans votre profil pour ajouter une clé."
+                )
+
+        return cleaned_data
+
+    def check_video_file(self):
+        """Vérifie le fichier vidéo envoyé avec le formulaire."""
         video_file = self.files.get("video_file") if self.files else None
 
         # Vérifier que le fichier vidéo est présent
@@ -123,20 +164,21 @@ class LiveForm(forms.ModelForm):
                     f"Types autorisés: {', '.join(allowed_types)}"
                 )
 
-        if is_scheduled and not scheduled_at:
-            raise forms.ValidationError(
-                "La date et heure de programmation sont requises pour "
-                "une diffusion programmée."
-            )
 
-        # Vérifier si l'utilisateur a des clés de streaming configurées
-        if self.user and not stream_key:
-            user_keys = StreamKey.objects.filter(user=self.user, is_active=True)
-            if not user_keys.exists():
-                raise forms.ValidationError(
-                    "Vous devez d'abord configurer au moins une clé de streaming "
-                    "dans votre profil avant de créer un live. "
-                    "Allez dans votre profil pour ajouter une clé."
-                )
+class UploadedLiveForm(LiveForm):
+    """Live dont la vidéo est déjà sur le serveur: upload reprenable terminé
+    (``upload``) ou vidéo déjà connue par son empreinte."""
 
-        return cleaned_data
+    class Meta(LiveForm.Meta):
+        fields = [field for field in LiveForm.Meta.fields if field != "video_file"]
+
+    def __init__(self, *args, **kwargs):
+        self.upload = kwargs.pop("upload", None)
+        super().__init__(*args, **kwargs)
+
+    def check_video_file(self):
+        if self.upload and not self.upload.is_complete:
+            raise forms.ValidationError(
+                f"Upload incomplet: {self.upload.offset}/{self.upload.size} octets "
+                f"reçus."
+            )
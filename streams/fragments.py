@@ -0,0 +1,101 @@
+"""
+Cache par utilisateur des fragments de pages: liste des lives du dashboard
+et clés de streaming du profil.
+
+Un fragment est stocké sous une clé qui contient la *version* de ce
+fragment pour l'utilisateur. Tout changement de ses lives, de ses clés ou
+de son compte incrémente la version (voir ``signals`` et ``states``): les
+anciens fragments ne sont plus lus et expirent d'eux-mêmes, sans avoir à
+énumérer les pages et filtres en cache. Les hits et misses de chaque
+fragment sont comptés dans le cache (voir ``counters``). La version
+``approval`` sert d'ETag au statut d'approbation, sans fragment associé.
+Un cache indisponible ne fait jamais échouer une page ni une mise à jour.
+"""
+
+import hashlib
+import time
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+FRAGMENTS = ("lives", "stream_keys")
+
+
+def _version_key(fragment, user_id):
+    return f"fragment-version:{fragment}:{user_id}"
+
+
+def _counter_key(fragment, event):
+    return f"fragment-stats:{fragment}:{event}"
+
+
+def version(fragment, user_id):
+    """Version courante d'un fragment. La version initiale est horodatée:
+    une version évincée du cache ne peut pas ressusciter d'anciens fragments."""
+    return cache.get_or_set(
+        _version_key(fragment, user_id), time.time_ns(), timeout=None
+    )
+
+
+def invalidate(fragment, user_ids):
+    """Rend obsolètes les fragments ``fragment`` des utilisateurs donnés."""
+    for user_id in set(user_ids):
+        try:
+            cache.incr(_version_key(fragment, user_id))
+        except ValueError:
+            pass  # Aucune version: rien en cache pour cet utilisateur
+        except redis.RedisError as e:
+            print(f"[DEBUG] Fragments non invalidés ({fragment}, {user_id}): {e}")
+
+
+def _count(fragment, event):
+    key = _counter_key(fragment, event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def cached(fragment, user_id, variant, render):
+    """HTML d'un fragment de l'utilisateur, rendu par ``render()`` en cas de
+    miss. ``variant`` distingue les déclinaisons (page, filtres...)."""
+    try:
+        digest = hashlib.md5(variant.encode()).hexdigest()
+        key = f"fragment:{fragment}:{user_id}:{version(fragment, user_id)}:{digest}"
+        html = cache.get(key)
+        _count(fragment, "misses" if html is None else "hits")
+    except redis.RedisError as e:
+        print(f"[DEBUG] Cache des fragments indisponible: {e}")
+        return render()
+    if html is None:
+        html = render()
+        try:
+            cache.set(key, str(html), settings.FRAGMENT_CACHE_TTL)
+        except redis.RedisError as e:
+            # Page rendue quand même: seul le prochain affichage sera recalculé
+            print(f"[DEBUG] Fragment non mis en cache ({fragment}): {e}")
+    return mark_safe(html)
+
+
+def counters():
+    """Hits, misses et taux de succès de chaque fragment."""
+    keys = [_counter_key(f, event) for f in FRAGMENTS for event in ("hits", "misses")]
+    try:
+        values = cache.get_many(keys)
+    except redis.RedisError as e:
+        print(f"[DEBUG] Compteurs des fragments indisponibles: {e}")
+        values = {}
+    result = {}
+    for fragment in FRAGMENTS:
+        hits = values.get(_counter_key(fragment, "hits"), 0)
+        misses = values.get(_counter_key(fragment, "misses"), 0)
+        total = hits + misses
+        result[fragment] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else None,
+        }
+    return result
@@ -0,0 +1,20 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from streams.supervisor import StreamSupervisor, install_child_watcher
+
+
+class Command(BaseCommand):
+    help = "Démarre le superviseur qui possède et surveille les processus FFmpeg."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--node",
+            help="Nom du nœud de diffusion (par défaut: STREAM_NODE_NAME).",
+        )
+
+    def handle(self, *args, **options):
+        install_child_watcher()
+        supervisor = StreamSupervisor(node_name=options["node"], stdout=self.stdout)
+        asyncio.run(supervisor.run())
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0004_alter_streamkey_platform"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="live",
+            name="stream_file",
+            field=models.FileField(
+                blank=True, upload_to="videos/", verbose_name="Rendu prêt à diffuser"
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0005_live_stream_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="live",
+            name="processing_progress",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="Progression de la préparation (%)"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="live",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "En préparation"),
+                    ("pending", "En attente"),
+                    ("running", "En cours"),
+                    ("completed", "Terminé"),
+                    ("failed", "Échoué"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="Statut",
+            ),
+        ),
+    ]
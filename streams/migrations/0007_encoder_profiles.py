@@ -0,0 +1,149 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0006_live_processing_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EncoderProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, unique=True, verbose_name="Nom"),
+                ),
+                ("slug", models.SlugField(unique=True, verbose_name="Identifiant")),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Description"
+                    ),
+                ),
+                (
+                    "video_codec",
+                    models.CharField(
+                        choices=[
+                            ("copy", "Copie (sans réencodage)"),
+                            ("libx264", "H.264 (libx264)"),
+                            ("none", "Aucune vidéo (audio seul)"),
+                        ],
+                        default="libx264",
+                        max_length=20,
+                        verbose_name="Codec vidéo",
+                    ),
+                ),
+                (
+                    "preset",
+                    models.CharField(
+                        default="ultrafast", max_length=20, verbose_name="Preset x264"
+                    ),
+                ),
+                (
+                    "width",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Largeur"
+                    ),
+                ),
+                (
+                    "height",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Hauteur"
+                    ),
+                ),
+                (
+                    "fps",
+                    models.PositiveSmallIntegerField(
+                        blank=True, null=True, verbose_name="Images par seconde"
+                    ),
+                ),
+                (
+                    "video_bitrate",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Débit vidéo (kbps)"
+                    ),
+                ),
+                (
+                    "maxrate",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Débit maximum (kbps)"
+                    ),
+                ),
+                (
+                    "bufsize",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Taille du buffer (kbit)"
+                    ),
+                ),
+                (
+                    "gop",
+                    models.PositiveSmallIntegerField(
+                        blank=True, null=True, verbose_name="Taille du GOP (images)"
+                    ),
+                ),
+                (
+                    "audio_codec",
+                    models.CharField(
+                        choices=[("copy", "Copie (sans réencodage)"), ("aac", "AAC")],
+                        default="aac",
+                        max_length=20,
+                        verbose_name="Codec audio",
+                    ),
+                ),
+                (
+                    "audio_bitrate",
+                    models.PositiveIntegerField(
+                        default=128, verbose_name="Débit audio (kbps)"
+                    ),
+                ),
+                (
+                    "is_default",
+                    models.BooleanField(
+                        default=False, verbose_name="Profil par défaut"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Profil d'encodage",
+                "verbose_name_plural": "Profils d'encodage",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="live",
+            name="encoder_profile",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Par défaut: profil de la clé, sinon profil par défaut.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="streams.encoderprofile",
+                verbose_name="Profil d'encodage",
+            ),
+        ),
+        migrations.AddField(
+            model_name="streamkey",
+            name="encoder_profile",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="streams.encoderprofile",
+                verbose_name="Profil d'encodage",
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated manually for data migration
+
+from django.db import migrations
+
+PROFILES = [
+    {
+        "slug": "copy",
+        "name": "Copie directe",
+        "description": "Relaie la source telle quelle, sans réencodage.",
+        "video_codec": "copy",
+        "audio_codec": "copy",
+    },
+    {
+        "slug": "low-360p",
+        "name": "360p économique",
+        "description": "Faible coût CPU, adapté aux diffusions en boucle.",
+        "video_codec": "libx264",
+        "preset": "ultrafast",
+        "width": 640,
+        "height": 360,
+        "video_bitrate": 500,
+        "maxrate": 800,
+        "bufsize": 1200,
+        "gop": 60,
+        "audio_codec": "aac",
+        "audio_bitrate": 96,
+        "is_default": True,
+    },
+    {
+        "slug": "720p30",
+        "name": "720p 30 i/s",
+        "description": "Qualité HD standard.",
+        "video_codec": "libx264",
+        "preset": "veryfast",
+        "width": 1280,
+        "height": 720,
+        "fps": 30,
+        "video_bitrate": 2500,
+        "maxrate": 3000,
+        "bufsize": 5000,
+        "gop": 60,
+        "audio_codec": "aac",
+        "audio_bitrate": 128,
+    },
+    {
+        "slug": "1080p30",
+        "name": "1080p 30 i/s",
+        "description": "Haute qualité, coût CPU élevé.",
+        "video_codec": "libx264",
+        "preset": "veryfast",
+        "width": 1920,
+        "height": 1080,
+        "fps": 30,
+        "video_bitrate": 4500,
+        "maxrate": 6000,
+        "bufsize": 9000,
+        "gop": 60,
+        "audio_codec": "aac",
+        "audio_bitrate": 160,
+    },
+    {
+        "slug": "audio-only",
+        "name": "Audio seul",
+        "description": "Diffuse uniquement la piste audio.",
+        "video_codec": "none",
+        "audio_codec": "aac",
+        "audio_bitrate": 128,
+    },
+]
+
+
+def create_profiles(apps, schema_editor):
+    EncoderProfile = apps.get_model("streams", "EncoderProfile")
+    for profile in PROFILES:
+        EncoderProfile.objects.update_or_create(
+            slug=profile["slug"],
+            defaults={k: v for k, v in profile.items() if k != "slug"},
+        )
+
+
+def delete_profiles(apps, schema_editor):
+    EncoderProfile = apps.get_model("streams", "EncoderProfile")
+    EncoderProfile.objects.filter(slug__in=[p["slug"] for p in PROFILES]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0007_encoder_profiles"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_profiles, delete_profiles),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0008_seed_encoder_profiles"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="live",
+            name="extra_stream_keys",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Diffusées par le même processus FFmpeg que la clé principale.",
+                related_name="multistream_lives",
+                to="streams.streamkey",
+                verbose_name="Destinations supplémentaires",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0009_live_extra_stream_keys"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="live",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "En préparation"),
+                    ("pending", "En attente"),
+                    ("starting", "Démarrage"),
+                    ("running", "En cours"),
+                    ("completed", "Terminé"),
+                    ("failed", "Échoué"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="Statut",
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0010_live_starting_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StreamHealthSample",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Mesuré le"),
+                ),
+                (
+                    "fps",
+                    models.FloatField(blank=True, null=True, verbose_name="Images/s"),
+                ),
+                (
+                    "bitrate_kbps",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="Débit (kbps)"
+                    ),
+                ),
+                (
+                    "speed",
+                    models.FloatField(blank=True, null=True, verbose_name="Vitesse"),
+                ),
+                (
+                    "drop_frames",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Images perdues"
+                    ),
+                ),
+                (
+                    "dup_frames",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Images dupliquées"
+                    ),
+                ),
+                (
+                    "out_time_ms",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="Position (ms)"
+                    ),
+                ),
+                (
+                    "live",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="health_samples",
+                        to="streams.live",
+                        verbose_name="Live",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Mesure de santé",
+                "verbose_name_plural": "Mesures de santé",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["live", "-created_at"],
+                        name="streams_str_live_id_8b3e63_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0011_stream_health_samples"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encoderprofile",
+            name="measured_cpu",
+            field=models.FloatField(
+                blank=True,
+                help_text="Moyenne glissante mesurée par le superviseur sur les lives réels.",
+                null=True,
+                verbose_name="Coût CPU mesuré (% d'un cœur)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="live",
+            name="admitted_cost",
+            field=models.FloatField(
+                default=0, verbose_name="Coût CPU réservé (% d'un cœur)"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="live",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "En préparation"),
+                    ("pending", "En attente"),
+                    ("queued", "En file d'attente"),
+                    ("starting", "Démarrage"),
+                    ("running", "En cours"),
+                    ("completed", "Terminé"),
+                    ("failed", "Échoué"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="Statut",
+            ),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0012_admission_control"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StreamNode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.SlugField(max_length=100, unique=True, verbose_name="Nom"),
+                ),
+                (
+                    "host",
+                    models.CharField(blank=True, max_length=255, verbose_name="Hôte"),
+                ),
+                (
+                    "capacity",
+                    models.FloatField(
+                        default=0,
+                        help_text="Part des cœurs utilisable par les lives, annoncée par le nœud.",
+                        verbose_name="Capacité (% d'un cœur)",
+                    ),
+                ),
+                (
+                    "current_load",
+                    models.FloatField(
+                        default=0, verbose_name="Charge actuelle (% d'un cœur)"
+                    ),
+                ),
+                (
+                    "last_heartbeat",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Dernier signal"
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Décocher pour ne plus placer de nouveaux lives sur ce nœud.",
+                        verbose_name="Actif",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Créé le"),
+                ),
+            ],
+            options={
+                "verbose_name": "Nœud de diffusion",
+                "verbose_name_plural": "Nœuds de diffusion",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="live",
+            name="node",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="lives",
+                to="streams.streamnode",
+                verbose_name="Nœud de diffusion",
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0014_upload_sessions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VideoAsset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Empreinte SHA-256"
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(upload_to="videos/", verbose_name="Fichier vidéo"),
+                ),
+                ("size", models.BigIntegerField(verbose_name="Taille (octets)")),
+                (
+                    "ref_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Lives utilisant la vidéo"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Créé le"),
+                ),
+            ],
+            options={
+                "verbose_name": "Vidéo",
+                "verbose_name_plural": "Vidéos",
+            },
+        ),
+        migrations.AddField(
+            model_name="live",
+            name="video_asset",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="lives",
+                to="streams.videoasset",
+                verbose_name="Vidéo partagée",
+            ),
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0015_video_assets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videoasset",
+            name="audio_channels",
+            field=models.PositiveSmallIntegerField(
+                blank=True, null=True, verbose_name="Canaux audio"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="audio_codec",
+            field=models.CharField(
+                blank=True, max_length=50, verbose_name="Codec audio"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="audio_duration",
+            field=models.FloatField(
+                blank=True, null=True, verbose_name="Durée audio (s)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="audio_layout",
+            field=models.CharField(
+                blank=True, max_length=50, verbose_name="Disposition audio"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="audio_sample_rate",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Échantillonnage (Hz)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="bitrate_kbps",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Débit total (kbps)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="container",
+            field=models.CharField(
+                blank=True, max_length=100, verbose_name="Conteneur"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="duration",
+            field=models.FloatField(blank=True, null=True, verbose_name="Durée (s)"),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="fps",
+            field=models.FloatField(blank=True, null=True, verbose_name="Images/s"),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="height",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Hauteur"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="is_vfr",
+            field=models.BooleanField(default=False, verbose_name="Fréquence variable"),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="keyframe_interval",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                verbose_name="Intervalle max. entre images clés (s)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="probe_error",
+            field=models.TextField(blank=True, verbose_name="Erreur d'analyse"),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="probed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Analysée le"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="video_codec",
+            field=models.CharField(
+                blank=True, max_length=50, verbose_name="Codec vidéo"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="video_profile",
+            field=models.CharField(
+                blank=True, max_length=50, verbose_name="Profil vidéo"
+            ),
+        ),
+        migrations.AddField(
+            model_name="videoasset",
+            name="width",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Largeur"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0016_video_asset_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="live",
+            name="delivery_mode",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("remux", "Copie de la source (sans réencodage)"),
+                    ("rendition", "Rendu pré-encodé"),
+                    ("transcode", "Encodage à la volée"),
+                ],
+                max_length=20,
+                verbose_name="Mode de diffusion",
+            ),
+        ),
+    ]
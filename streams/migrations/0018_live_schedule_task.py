@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0017_live_delivery_mode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="live",
+            name="schedule_task_id",
+            field=models.CharField(
+                blank=True, max_length=255, verbose_name="Tâche de démarrage programmée"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0018_live_schedule_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="live",
+            name="start_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Heure exacte de lancement d'un live programmé",
+                null=True,
+                verbose_name="Lancement de FFmpeg",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0019_live_start_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="live",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "En préparation"),
+                    ("pending", "En attente"),
+                    ("queued", "En file d'attente"),
+                    ("starting", "Démarrage"),
+                    ("running", "En cours"),
+                    ("stopping", "Arrêt en cours"),
+                    ("completed", "Terminé"),
+                    ("failed", "Échoué"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="Statut",
+            ),
+        ),
+    ]
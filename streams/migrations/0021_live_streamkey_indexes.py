@@ -0,0 +1,45 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0020_live_stopping_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="live",
+            index=models.Index(
+                fields=["user", "-created_at"], name="streams_liv_user_id_91afe1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="live",
+            index=models.Index(
+                fields=["status", "updated_at"], name="streams_liv_status_560072_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="live",
+            index=models.Index(
+                fields=["node", "status"], name="streams_liv_node_id_9b65b0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="live",
+            index=models.Index(
+                condition=models.Q(("is_scheduled", True)),
+                fields=["status", "scheduled_at"],
+                name="live_scheduled_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="streamkey",
+            index=models.Index(
+                fields=["user", "is_active"], name="streams_str_user_id_c28e4d_idx"
+            ),
+        ),
+    ]
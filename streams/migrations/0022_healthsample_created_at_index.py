@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("streams", "0021_live_streamkey_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="streamhealthsample",
+            index=models.Index(
+                fields=["created_at"], name="streams_str_created_106e68_idx"
+            ),
+        ),
+    ]
@@ -1,3 +1,7 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -16,6 +20,81 @@ class User(AbstractUser):
         return self.email
 
 
+class EncoderProfile(models.Model):
+    """Profil d'encodage FFmpeg sélectionnable par live ou par clé."""
+
+    VIDEO_CODEC_CHOICES = [
+        ("copy", "Copie (sans réencodage)"),
+        ("libx264", "H.264 (libx264)"),
+        ("none", "Aucune vidéo (audio seul)"),
+    ]
+    AUDIO_CODEC_CHOICES = [
+        ("copy", "Copie (sans réencodage)"),
+        ("aac", "AAC"),
+    ]
+
+    name = models.CharField(max_length=100, unique=True, verbose_name="Nom")
+    slug = models.SlugField(max_length=50, unique=True, verbose_name="Identifiant")
+    description = models.CharField(
+        max_length=255, blank=True, verbose_name="Description"
+    )
+    video_codec = models.CharField(
+        max_length=20,
+        choices=VIDEO_CODEC_CHOICES,
+        default="libx264",
+        verbose_name="Codec vidéo",
+    )
+    preset = models.CharField(
+        max_length=20, default="ultrafast", verbose_name="Preset x264"
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name="Largeur")
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name="Hauteur")
+    fps = models.PositiveSmallIntegerField(
+        null=True, blank=True, verbose_name="Images par seconde"
+    )
+    video_bitrate = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Débit vidéo (kbps)"
+    )
+    maxrate = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Débit maximum (kbps)"
+    )
+    bufsize = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Taille du buffer (kbit)"
+    )
+    gop = models.PositiveSmallIntegerField(
+        null=True, blank=True, verbose_name="Taille du GOP (images)"
+    )
+    audio_codec = models.CharField(
+        max_length=20,
+        choices=AUDIO_CODEC_CHOICES,
+        default="aac",
+        verbose_name="Codec audio",
+    )
+    audio_bitrate = models.PositiveIntegerField(
+        default=128, verbose_name="Débit audio (kbps)"
+    )
+    is_default = models.BooleanField(default=False, verbose_name="Profil par défaut")
+    measured_cpu = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Coût CPU mesuré (% d'un cœur)",
+        help_text="Moyenne glissante mesurée par le superviseur sur les lives réels.",
+    )
+
+    class Meta:
+        verbose_name = "Profil d'encodage"
+        verbose_name_plural = "Profils d'encodage"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def is_passthrough(self):
+        """Vérifie si le profil relaie la source sans réencodage."""
+        return self.video_codec == "copy" and self.audio_codec == "copy"
+
+
 class StreamKey(models.Model):
     """Modèle pour les clés de streaming des utilisateurs."""
 
@@ -37,6 +116,13 @@ class StreamKey(models.Model):
         choices=PLATFORM_CHOICES,
         default="YouTube",
     )
+    encoder_profile = models.ForeignKey(
+        EncoderProfile,
+        on_delete=models.SET_NULL,
+        verbose_name="Profil d'encodage",
+        null=True,
+        blank=True,
+    )
     is_active = models.BooleanField(default=True, verbose_name="Active")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
@@ -45,17 +131,141 @@ class StreamKey(models.Model):
         verbose_name = "Clé de streaming"
         verbose_name_plural = "Clés de streaming"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "is_active"])]
 
     def __str__(self):
         return f"{self.name} - {self.user.email}"
 
 
+class VideoAsset(models.Model):
+    """Vidéo stockée une seule fois, identifiée par son empreinte SHA-256.
+
+    Plusieurs lives (de plusieurs utilisateurs) peuvent la référencer;
+    ``ref_count`` est tenu à jour par les signaux de ``Live`` et le fichier
+    est supprimé avec ses rendus quand plus aucun live ne l'utilise.
+    """
+
+    sha256 = models.CharField(
+        max_length=64, unique=True, verbose_name="Empreinte SHA-256"
+    )
+    file = models.FileField(upload_to="videos/", verbose_name="Fichier vidéo")
+    size = models.BigIntegerField(verbose_name="Taille (octets)")
+    ref_count = models.PositiveIntegerField(
+        default=0, verbose_name="Lives utilisant la vidéo"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+
+    # Métadonnées ffprobe, calculées une seule fois par vidéo (voir assets.probe)
+    probed_at = models.DateTimeField(null=True, blank=True, verbose_name="Analysée le")
+    probe_error = models.TextField(blank=True, verbose_name="Erreur d'analyse")
+    duration = models.FloatField(null=True, blank=True, verbose_name="Durée (s)")
+    container = models.CharField(max_length=100, blank=True, verbose_name="Conteneur")
+    bitrate_kbps = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Débit total (kbps)"
+    )
+    video_codec = models.CharField(
+        max_length=50, blank=True, verbose_name="Codec vidéo"
+    )
+    video_profile = models.CharField(
+        max_length=50, blank=True, verbose_name="Profil vidéo"
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name="Largeur")
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name="Hauteur")
+    fps = models.FloatField(null=True, blank=True, verbose_name="Images/s")
+    is_vfr = models.BooleanField(default=False, verbose_name="Fréquence variable")
+    keyframe_interval = models.FloatField(
+        null=True, blank=True, verbose_name="Intervalle max. entre images clés (s)"
+    )
+    audio_codec = models.CharField(
+        max_length=50, blank=True, verbose_name="Codec audio"
+    )
+    audio_channels = models.PositiveSmallIntegerField(
+        null=True, blank=True, verbose_name="Canaux audio"
+    )
+    audio_layout = models.CharField(
+        max_length=50, blank=True, verbose_name="Disposition audio"
+    )
+    audio_sample_rate = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Échantillonnage (Hz)"
+    )
+    audio_duration = models.FloatField(
+        null=True, blank=True, verbose_name="Durée audio (s)"
+    )
+
+    class Meta:
+        verbose_name = "Vidéo"
+        verbose_name_plural = "Vidéos"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.file.name})"
+
+    @property
+    def has_audio(self):
+        """Vrai si la vidéo a une piste audio non vide."""
+        return bool(self.audio_codec) and self.audio_duration != 0
+
+    @property
+    def duration_display(self):
+        if self.duration is None:
+            return ""
+        minutes, seconds = divmod(int(self.duration), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes}:{seconds:02d}"
+
+    def rendition_name(self, encoding_key):
+        """Rendu partagé par tous les lives de cette vidéo et de ces paramètres."""
+        return f"videos/{self.sha256}.{encoding_key}.stream.flv"
+
+
+class StreamNode(models.Model):
+    """Serveur de diffusion faisant tourner un superviseur FFmpeg."""
+
+    name = models.SlugField(max_length=100, unique=True, verbose_name="Nom")
+    host = models.CharField(max_length=255, blank=True, verbose_name="Hôte")
+    capacity = models.FloatField(
+        default=0,
+        verbose_name="Capacité (% d'un cœur)",
+        help_text="Part des cœurs utilisable par les lives, annoncée par le nœud.",
+    )
+    current_load = models.FloatField(
+        default=0, verbose_name="Charge actuelle (% d'un cœur)"
+    )
+    last_heartbeat = models.DateTimeField(
+        null=True, blank=True, verbose_name="Dernier signal"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Actif",
+        help_text="Décocher pour ne plus placer de nouveaux lives sur ce nœud.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+
+    class Meta:
+        verbose_name = "Nœud de diffusion"
+        verbose_name_plural = "Nœuds de diffusion"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def queue_name(self):
+        """File Celery consommée par le worker de ce nœud."""
+        return f"node.{self.name}"
+
+
 class Live(models.Model):
     """Modèle pour les lives/diffusions."""
 
     STATUS_CHOICES = [
+        ("processing", "En préparation"),
         ("pending", "En attente"),
+        ("queued", "En file d'attente"),
+        ("starting", "Démarrage"),
         ("running", "En cours"),
+        ("stopping", "Arrêt en cours"),
         ("completed", "Terminé"),
         ("failed", "Échoué"),
     ]
@@ -63,6 +273,19 @@ class Live(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Utilisateur")
     title = models.CharField(max_length=200, verbose_name="Titre")
     video_file = models.FileField(upload_to="videos/", verbose_name="Fichier vidéo")
+    video_asset = models.ForeignKey(
+        VideoAsset,
+        on_delete=models.SET_NULL,
+        related_name="lives",
+        verbose_name="Vidéo partagée",
+        null=True,
+        blank=True,
+    )
+    stream_file = models.FileField(
+        upload_to="videos/",
+        blank=True,
+        verbose_name="Rendu prêt à diffuser",
+    )
     stream_key = models.ForeignKey(
         StreamKey,
         on_delete=models.CASCADE,
@@ -70,15 +293,64 @@ class Live(models.Model):
         null=True,
         blank=True,
     )
+    extra_stream_keys = models.ManyToManyField(
+        StreamKey,
+        blank=True,
+        related_name="multistream_lives",
+        verbose_name="Destinations supplémentaires",
+        help_text="Diffusées par le même processus FFmpeg que la clé principale.",
+    )
+    encoder_profile = models.ForeignKey(
+        EncoderProfile,
+        on_delete=models.SET_NULL,
+        verbose_name="Profil d'encodage",
+        null=True,
+        blank=True,
+        help_text="Par défaut: profil de la clé, sinon profil par défaut.",
+    )
     scheduled_at = models.DateTimeField(
         null=True, blank=True, verbose_name="Programmé pour"
     )
     is_scheduled = models.BooleanField(
         default=False, verbose_name="Diffusion programmée"
     )
+    schedule_task_id = models.CharField(
+        max_length=255, blank=True, verbose_name="Tâche de démarrage programmée"
+    )
+    start_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Lancement de FFmpeg",
+        help_text="Heure exacte de lancement d'un live programmé",
+    )
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default="pending", verbose_name="Statut"
     )
+    processing_progress = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Progression de la préparation (%)"
+    )
+    admitted_cost = models.FloatField(
+        default=0, verbose_name="Coût CPU réservé (% d'un cœur)"
+    )
+    node = models.ForeignKey(
+        StreamNode,
+        on_delete=models.SET_NULL,
+        related_name="lives",
+        verbose_name="Nœud de diffusion",
+        null=True,
+        blank=True,
+    )
+    DELIVERY_CHOICES = [
+        ("remux", "Copie de la source (sans réencodage)"),
+        ("rendition", "Rendu pré-encodé"),
+        ("transcode", "Encodage à la volée"),
+    ]
+    delivery_mode = models.CharField(
+        max_length=20,
+        choices=DELIVERY_CHOICES,
+        blank=True,
+        verbose_name="Mode de diffusion",
+    )
     ffmpeg_pid = models.IntegerField(null=True, blank=True, verbose_name="PID FFmpeg")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
@@ -87,6 +359,20 @@ class Live(models.Model):
         verbose_name = "Live"
         verbose_name_plural = "Lives"
         ordering = ["-created_at"]
+        indexes = [
+            # Dashboard: lives d'un utilisateur, du plus récent au plus ancien
+            models.Index(fields=["user", "-created_at"]),
+            # Comptes par statut, file d'admission (par updated_at)
+            models.Index(fields=["status", "updated_at"]),
+            # Charge et lives d'un nœud (superviseur, admission)
+            models.Index(fields=["node", "status"]),
+            # Planificateur: seuls les lives programmés sont indexés
+            models.Index(
+                fields=["status", "scheduled_at"],
+                condition=models.Q(is_scheduled=True),
+                name="live_scheduled_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.user.email}"
@@ -96,12 +382,136 @@ class Live(models.Model):
         """Vérifie si le live est en cours."""
         return self.status == "running"
 
+    @property
+    def is_queued(self):
+        """Vérifie si le live attend de la capacité pour démarrer."""
+        return self.status == "queued"
+
+    @property
+    def is_processing(self):
+        """Vérifie si la vidéo est encore en cours de préparation."""
+        return self.status == "processing"
+
+    @property
+    def has_stream_file(self):
+        """Vérifie si un rendu FLV prêt à diffuser est disponible."""
+        return bool(self.stream_file) and os.path.exists(self.stream_file.path)
+
+    def get_destinations(self):
+        """Clés de diffusion du live: clé principale puis destinations actives."""
+        destinations = [self.stream_key] if self.stream_key else []
+        for stream_key in self.extra_stream_keys.filter(is_active=True):
+            if stream_key.id != self.stream_key_id:
+                destinations.append(stream_key)
+        return destinations
+
     @property
     def can_start(self):
         """Vérifie si le live peut être démarré."""
         return self.status == "pending" and self.user.is_approved
 
+    @property
+    def can_stop(self):
+        """Vérifie si le live peut être arrêté (en file, démarrage ou en cours)."""
+        return self.status in ["queued", "starting", "running"]
+
     @property
     def can_restart(self):
         """Vérifie si le live peut être relancé (terminé ou échoué)."""
         return self.status in ["completed", "failed"] and self.user.is_approved
+
+
+class UploadSession(models.Model):
+    """Upload reprenable d'une vidéo, reçu par morceaux (protocole type tus).
+
+    Les morceaux sont ajoutés directement au fichier ``uploads/<id>.part``
+    de ``MEDIA_ROOT``; à la finalisation, le fichier est renommé dans
+    ``videos/`` (même système de fichiers, sans copie).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+        verbose_name="Utilisateur",
+    )
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    size = models.BigIntegerField(verbose_name="Taille totale (octets)")
+    offset = models.BigIntegerField(default=0, verbose_name="Octets reçus")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+
+    class Meta:
+        verbose_name = "Upload en cours"
+        verbose_name_plural = "Uploads en cours"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.MEDIA_ROOT, "uploads", f"{self.id}.part")
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+    def discard(self):
+        """Supprime la session et les octets déjà reçus."""
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+        self.delete()
+
+
+class StreamHealthSample(models.Model):
+    """Mesure de santé d'un live lue sur la sortie ``-progress`` de FFmpeg."""
+
+    live = models.ForeignKey(
+        Live,
+        on_delete=models.CASCADE,
+        related_name="health_samples",
+        verbose_name="Live",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Mesuré le")
+    fps = models.FloatField(null=True, blank=True, verbose_name="Images/s")
+    bitrate_kbps = models.FloatField(null=True, blank=True, verbose_name="Débit (kbps)")
+    speed = models.FloatField(null=True, blank=True, verbose_name="Vitesse")
+    drop_frames = models.PositiveIntegerField(default=0, verbose_name="Images perdues")
+    dup_frames = models.PositiveIntegerField(
+        default=0, verbose_name="Images dupliquées"
+    )
+    out_time_ms = models.BigIntegerField(
+        null=True, blank=True, verbose_name="Position (ms)"
+    )
+
+    class Meta:
+        verbose_name = "Mesure de santé"
+        verbose_name_plural = "Mesures de santé"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["live", "-created_at"]),
+            # Purge périodique des mesures hors rétention
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.live_id} @ {self.created_at:%H:%M:%S} ({self.speed}x)"
+
+    @property
+    def is_behind(self):
+        """Vrai si l'encodage ne tient plus le temps réel."""
+        return self.speed is not None and self.speed < 1.0
+
+    def as_dict(self):
+        return {
+            "created_at": self.created_at.isoformat(),
+            "fps": self.fps,
+            "bitrate_kbps": self.bitrate_kbps,
+            "speed": self.speed,
+            "drop_frames": self.drop_frames,
+            "dup_frames": self.dup_frames,
+            "out_time_ms": self.out_time_ms,
+        }
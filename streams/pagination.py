@@ -0,0 +1,48 @@
+"""
+Pagination par curseur (keyset) des listes de lives.
+
+Une page est lue avec ``WHERE (created_at, id) < curseur ORDER BY created_at
+DESC, id DESC LIMIT n``: contrairement à ``OFFSET``, le coût d'une page ne
+dépend pas de sa profondeur et l'index ``(user, -created_at)`` est parcouru
+directement. Le curseur est la position du dernier élément de la page.
+"""
+
+from datetime import datetime, timezone
+
+from django.db.models import Q
+
+CURSOR_FORMAT = "%Y%m%d%H%M%S%f"
+
+
+def encode_cursor(obj):
+    """Curseur (sans caractère à échapper dans une URL) après ``obj``."""
+    created_at = obj.created_at.astimezone(timezone.utc).strftime(CURSOR_FORMAT)
+    return f"{created_at}-{obj.id}"
+
+
+def decode_cursor(cursor):
+    """Position ``(created_at, id)`` d'un curseur, ou None s'il est invalide."""
+    try:
+        created_at, pk = cursor.split("-")
+        return (
+            datetime.strptime(created_at, CURSOR_FORMAT).replace(tzinfo=timezone.utc),
+            int(pk),
+        )
+    except ValueError:
+        return None
+
+
+def keyset_page(queryset, cursor, size):
+    """Éléments de la page qui suit ``cursor`` (la première si None) et
+    curseur de la page suivante (None s'il n'y en a pas)."""
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    # Un élément de plus pour savoir s'il existe une page suivante
+    items = list(queryset.order_by("-created_at", "-id")[: size + 1])
+    if len(items) > size:
+        return items[:size], encode_cursor(items[size - 1])
+    return items, None
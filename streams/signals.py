@@ -0,0 +1,97 @@
+"""
+Signaux de l'application streams.
+"""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import assets, events, fragments, stats
+from .models import Live, StreamKey, User
+from .tasks import unschedule_live
+
+
+@receiver(post_save, sender=Live)
+def retain_video_asset(sender, instance, created, **kwargs):
+    """Compte la référence d'un nouveau live à sa vidéo partagée."""
+    if created and instance.video_asset_id:
+        assets.retain(instance.video_asset_id)
+
+
+@receiver(post_delete, sender=Live)
+def release_video_asset(sender, instance, **kwargs):
+    """Libère la vidéo partagée quand plus aucun live ne l'utilise."""
+    if instance.video_asset_id:
+        assets.release(instance.video_asset_id)
+
+
+@receiver(post_delete, sender=Live)
+def revoke_scheduled_start(sender, instance, **kwargs):
+    """Annule le démarrage programmé d'un live supprimé."""
+    if instance.schedule_task_id:
+        try:
+            unschedule_live(instance)
+        except Exception as e:
+            # La tâche ignorera de toute façon un live disparu
+            print(f"[DEBUG] Révocation impossible ({instance.id}): {e}")
+
+
+def _account_changed(update_fields, fields=("is_approved", "is_admin")):
+    """Faux pour une sauvegarde partielle qui ne touche aucun de ``fields``
+    (``last_login`` à chaque connexion)."""
+    return update_fields is None or any(field in update_fields for field in fields)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_admin_stats(sender, update_fields=None, **kwargs):
+    """Les compteurs d'utilisateurs du dashboard admin sont à recalculer."""
+    if _account_changed(update_fields):
+        stats.invalidate()
+
+
+@receiver(post_save, sender=User)
+def publish_approval(sender, instance, created, update_fields=None, **kwargs):
+    """Pousse le statut d'approbation aux dashboards ouverts de l'utilisateur
+    (approbation par un admin), au lieu de les laisser interroger le serveur.
+
+    Les sauvegardes partielles sans ``is_approved`` (``last_login`` à chaque
+    connexion) ne publient rien. La version ``approval`` de l'utilisateur,
+    qui sert d'ETag à ``check_approval_status``, est incrémentée.
+    """
+    if created or not _account_changed(update_fields, ["is_approved"]):
+        return
+    fragments.invalidate("approval", [instance.id])
+    events.publish(instance.id, "approval", {"is_approved": instance.is_approved})
+
+
+@receiver(post_save, sender=Live)
+@receiver(post_delete, sender=Live)
+def invalidate_live_fragments(sender, instance, **kwargs):
+    fragments.invalidate("lives", [instance.user_id])
+
+
+@receiver(post_save, sender=StreamKey)
+@receiver(post_delete, sender=StreamKey)
+def invalidate_stream_key_fragments(sender, instance, **kwargs):
+    fragments.invalidate("stream_keys", [instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_fragments(sender, instance, update_fields=None, **kwargs):
+    """L'approbation du compte change les actions proposées partout."""
+    if not _account_changed(update_fields):
+        return
+    for fragment in fragments.FRAGMENTS:
+        fragments.invalidate(fragment, [instance.id])
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Mode WAL pour SQLite: les lectures (dashboards, superviseur) ne sont
+    plus bloquées par les écritures des workers Celery."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
@@ -0,0 +1,82 @@
+"""
+Machine à états des lives.
+
+Chaque changement de statut est un ``UPDATE ... WHERE status IN (...)``
+conditionnel: de deux requêtes concurrentes (double clic, démarrage
+programmé, superviseur), une seule modifie la ligne et l'autre constate
+l'échec de la transition au lieu d'écraser le statut. Aucun verrou n'est
+gardé pendant les traitements qui suivent (démarrage de FFmpeg, arrêt).
+Chaque transition est publiée aux dashboards ouverts (voir ``events``) et
+rend obsolète la liste des lives en cache de leur propriétaire.
+
+    processing → pending → (queued →) starting → running → stopping → completed
+                                                      ↘ failed ↙
+"""
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from . import events, fragments
+from .models import Live
+
+# Statuts accessibles depuis chaque statut
+TRANSITIONS = {
+    "processing": ("pending", "failed"),
+    "pending": ("queued", "starting", "failed"),
+    # Un live en file n'a pas de processus: il est terminé directement
+    "queued": ("starting", "completed", "failed"),
+    # running → starting: relance du processus par le superviseur
+    "starting": ("running", "stopping", "failed"),
+    "running": ("starting", "stopping", "completed", "failed"),
+    "stopping": ("completed", "failed"),
+    "completed": ("pending",),
+    "failed": ("pending",),
+}
+
+
+def sources(target):
+    """Statuts depuis lesquels un live peut passer à ``target``."""
+    return [status for status, targets in TRANSITIONS.items() if target in targets]
+
+
+def transition(live, target, from_statuses=None, **fields):
+    """Fait passer un live (instance, id ou queryset) au statut ``target``.
+
+    Seules les lignes encore dans l'un des statuts ``from_statuses`` (par
+    défaut: tous ceux qui autorisent la transition) sont modifiées, avec les
+    champs supplémentaires ``fields``. Retourne le nombre de lives modifiés;
+    une instance est mise à jour en mémoire si la transition a eu lieu.
+    """
+    allowed = sources(target)
+    if from_statuses is None:
+        from_statuses = allowed
+    invalid = set(from_statuses) - set(allowed)
+    if invalid:
+        raise ValueError(f"Transition invalide: {sorted(invalid)} → {target}")
+
+    # Lives concernés (id, propriétaire), pour publier la transition
+    if isinstance(live, QuerySet):
+        changed = list(
+            live.filter(status__in=from_statuses).values_list("id", "user_id")
+        )
+        lives = Live.objects.filter(id__in=[live_id for live_id, _ in changed])
+    elif isinstance(live, Live):
+        changed = [(live.id, live.user_id)]
+        lives = Live.objects.filter(id=live.id)
+    else:
+        changed = None
+        lives = Live.objects.filter(id=live)
+    fields["updated_at"] = timezone.now()
+    updated = lives.filter(status__in=from_statuses).update(status=target, **fields)
+    if not updated:
+        return 0
+
+    if changed is None:
+        changed = list(lives.values_list("id", "user_id"))
+    events.publish_status(changed, target)
+    fragments.invalidate("lives", [user_id for _, user_id in changed])
+    if isinstance(live, Live):
+        live.status = target
+        for field, value in fields.items():
+            setattr(live, field, value)
+    return updated
@@ -0,0 +1,58 @@
+"""
+Statistiques du dashboard admin.
+
+Chaque table n'est parcourue qu'une fois: tous les compteurs d'une table
+sont des ``COUNT`` conditionnels de la même requête d'agrégation. Le
+résultat est gardé en cache ``ADMIN_STATS_TTL`` secondes et invalidé dès
+qu'un utilisateur change (approbation, rôle, suppression); les compteurs de
+lives suivent avec au plus ce délai. Sans cache disponible, les compteurs
+sont calculés à chaque affichage.
+"""
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Live, User
+
+CACHE_KEY = "streams:admin-stats"
+
+
+def compute():
+    """Compteurs des utilisateurs et des lives (une requête par table)."""
+    return {
+        **User.objects.aggregate(
+            total_users=Count("id"),
+            approved_users=Count("id", filter=Q(is_approved=True)),
+            pending_users=Count("id", filter=Q(is_approved=False)),
+            admin_users=Count("id", filter=Q(is_admin=True)),
+        ),
+        **Live.objects.aggregate(
+            total_lives=Count("id"),
+            running_lives=Count("id", filter=Q(status="running")),
+        ),
+    }
+
+
+def admin_stats():
+    """Compteurs du dashboard admin, depuis le cache si possible."""
+    try:
+        stats = cache.get(CACHE_KEY)
+    except redis.RedisError as e:
+        print(f"[DEBUG] Cache des statistiques indisponible: {e}")
+        return compute()
+    if stats is None:
+        stats = compute()
+        try:
+            cache.set(CACHE_KEY, stats, settings.ADMIN_STATS_TTL)
+        except redis.RedisError as e:
+            print(f"[DEBUG] Statistiques non mises en cache: {e}")
+    return stats
+
+
+def invalidate():
+    try:
+        cache.delete(CACHE_KEY)
+    except redis.RedisError as e:
+        print(f"[DEBUG] Statistiques non invalidées: {e}")
@@ -0,0 +1,573 @@
+"""
+Superviseur des processus FFmpeg de LiveManager.
+
+Un seul processus asyncio possède tous les FFmpeg d'un nœud de diffusion:
+il annonce sa capacité (battement de cœur sur ``StreamNode``), démarre les
+lives placés sur son nœud à l'état ``starting`` (à l'heure exacte ``start_at``
+pour les lives programmés, préparés à l'avance), vide leurs sorties en continu,
+échantillonne leur santé (sortie ``-progress``), récupère leur code de
+sortie et les relance avec un délai croissant s'ils s'arrêtent de façon
+inattendue. Lancement: ``python manage.py run_supervisor [--node NOM]``.
+"""
+
+import asyncio
+import collections
+import os
+import signal
+import socket
+import sys
+import time
+
+import psutil
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import admission, events, ffmpeg, fragments, states
+from .models import EncoderProfile, Live, StreamHealthSample, StreamNode
+from .tasks import send_admin_notification, send_error_notification
+
+# SIGKILL n'existe pas sous Windows
+SIGKILL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+
+def install_child_watcher():
+    """Récupère les fins de processus via pidfd (ou SIGCHLD + waitpid)
+    plutôt qu'avec un thread par enfant, comportement par défaut avant 3.12."""
+    if not sys.platform.startswith("linux") or sys.version_info >= (3, 12):
+        return
+    if hasattr(os, "pidfd_open"):
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            asyncio.set_child_watcher(asyncio.PidfdChildWatcher())
+            return
+        except OSError:
+            pass  # Noyau trop ancien
+    asyncio.set_child_watcher(asyncio.SafeChildWatcher())
+
+
+def warm_page_cache(path):
+    """Demande au noyau de charger un fichier en cache (lecture anticipée)."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def _orphan_process(pid):
+    """Processus FFmpeg encore vivant sous ``pid``, ou None (terminé, ou pid
+    réutilisé depuis par un autre programme)."""
+    try:
+        process = psutil.Process(pid)
+        if "ffmpeg" in process.name().lower():
+            return process
+    except psutil.Error:
+        pass
+    return None
+
+
+def _signal_orphan(process, sig):
+    try:
+        if sys.platform.startswith("win"):
+            process.kill() if sig == SIGKILL else process.terminate()
+        else:
+            os.killpg(process.pid, sig)
+    except (ProcessLookupError, psutil.Error):
+        pass  # Déjà terminé
+
+
+def kill_orphans(pids, timeout):
+    """Arrête les groupes FFmpeg laissés par une instance précédente du
+    superviseur (lancés dans leur propre session, ils lui survivent):
+    SIGTERM, puis SIGKILL à ceux encore vivants après ``timeout``.
+    Retourne le nombre de processus arrêtés."""
+    orphans = [process for process in map(_orphan_process, pids) if process]
+    for process in orphans:
+        _signal_orphan(process, signal.SIGTERM)
+    _, alive = psutil.wait_procs(orphans, timeout=timeout)
+    for process in alive:
+        _signal_orphan(process, SIGKILL)
+    psutil.wait_procs(alive, timeout=timeout)
+    return len(orphans)
+
+
+class ManagedStream:
+    """Processus FFmpeg d'un live possédé par le superviseur."""
+
+    def __init__(self, live_id, process, profile_id=None, user_id=None):
+        self.live_id = live_id
+        self.user_id = user_id
+        self.process = process
+        self.profile_id = profile_id
+        try:
+            self.ps = psutil.Process(process.pid)
+            self.ps.cpu_percent(None)  # Amorce la mesure CPU
+        except psutil.Error:
+            self.ps = None
+        self.started_at = time.monotonic()
+        # Dernières lignes de stderr, pour diagnostiquer un crash
+        self.stderr_tail = collections.deque(maxlen=20)
+        self.progress = ffmpeg.ProgressParser()
+        self.last_sample_at = 0.0
+        self.watcher = None
+        self.stop_requested_at = None
+
+    @property
+    def uptime(self):
+        return time.monotonic() - self.started_at
+
+    def request_stop(self):
+        """Demande l'arrêt propre (SIGTERM), une seule fois."""
+        if self.stop_requested_at is None:
+            self.stop_requested_at = time.monotonic()
+            self.signal_group(signal.SIGTERM)
+
+    def signal_group(self, sig):
+        """Envoie un signal à tout le groupe de processus de FFmpeg."""
+        try:
+            if sys.platform.startswith("win"):
+                self.process.terminate()
+            else:
+                os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            pass  # Le processus n'existe plus
+
+
+class StreamSupervisor:
+    """Boucle asyncio qui démarre, surveille et relance les lives."""
+
+    def __init__(self, node_name=None, stdout=None):
+        self.stdout = stdout or sys.stdout
+        self.node_name = node_name or settings.STREAM_NODE_NAME
+        self.node = None
+        self.heartbeat_interval = getattr(settings, "NODE_HEARTBEAT_INTERVAL", 5.0)
+        self.last_heartbeat = 0.0
+        self.poll_interval = getattr(settings, "SUPERVISOR_POLL_INTERVAL", 1.0)
+        self.max_restarts = getattr(settings, "SUPERVISOR_MAX_RESTARTS", 5)
+        self.backoff_base = getattr(settings, "SUPERVISOR_BACKOFF_BASE", 2.0)
+        self.backoff_max = getattr(settings, "SUPERVISOR_BACKOFF_MAX", 60.0)
+        self.stable_uptime = getattr(settings, "SUPERVISOR_STABLE_UPTIME", 60.0)
+        self.stop_timeout = getattr(settings, "SUPERVISOR_STOP_TIMEOUT", 10.0)
+        self.sample_interval = getattr(settings, "HEALTH_SAMPLE_INTERVAL", 10.0)
+        self.cpu_warmup = getattr(settings, "ADMISSION_CPU_WARMUP", 30.0)
+        self.cpu_smoothing = getattr(settings, "ADMISSION_CPU_SMOOTHING", 0.2)
+        self.streams = {}
+        # Lives programmés préparés, en attente de leur heure de lancement
+        self.armed = {}
+        self.restart_attempts = collections.Counter()
+        self.restart_at = {}
+        self._stopping = False
+
+    def log(self, message):
+        self.stdout.write(f"[SUPERVISOR] {message}\n")
+        self.stdout.flush()
+
+    def notify(self, task, *args):
+        """Envoie une notification Celery sans jamais interrompre la supervision."""
+        try:
+            task.delay(*args)
+        except Exception as e:
+            self.log(f"Notification impossible: {e}")
+
+    # -- Accès base de données (synchrones, exécutés hors de la boucle) --
+
+    def _register_node(self):
+        node, _ = StreamNode.objects.update_or_create(
+            name=self.node_name, defaults={"host": socket.getfqdn()}
+        )
+        return node
+
+    def _heartbeat(self):
+        """Annonce la capacité et la charge réelle du nœud."""
+        capacity = (psutil.cpu_count() or 1) * 100 * settings.ADMISSION_MAX_UTILIZATION
+        return StreamNode.objects.filter(id=self.node.id).update(
+            capacity=capacity,
+            current_load=psutil.getloadavg()[0] * 100,
+            last_heartbeat=timezone.now(),
+        )
+
+    def _leave_node(self):
+        return StreamNode.objects.filter(id=self.node.id).update(last_heartbeat=None)
+
+    def _recover_running_lives(self):
+        """Remet en démarrage les lives du nœud laissés ``running`` par une
+        instance précédente: leurs processus ne sont plus nos enfants.
+
+        Ces processus (et ceux des lives ``stopping``) sont d'abord arrêtés,
+        pour ne jamais avoir deux encodeurs sur la même clé de diffusion.
+        """
+        lives = Live.objects.filter(node=self.node)
+        pids = lives.filter(
+            status__in=["running", "stopping"], ffmpeg_pid__isnull=False
+        ).values_list("ffmpeg_pid", flat=True)
+        killed = kill_orphans(list(pids), self.stop_timeout)
+        if killed:
+            self.log(f"{killed} FFmpeg orphelin(s) arrêté(s)")
+        return states.transition(lives, "starting", ["running"], ffmpeg_pid=None)
+
+    @staticmethod
+    def _profile_id(live):
+        return ffmpeg.effective_profile(live).pk
+
+    def _lives_to_start(self, exclude_ids):
+        return list(
+            Live.objects.filter(node=self.node, status="starting")
+            .exclude(id__in=exclude_ids)
+            .select_related("stream_key", "encoder_profile")
+            .order_by("updated_at")
+        )
+
+    @staticmethod
+    def _cancelled_ids(armed_ids):
+        """Lives préparés dont le démarrage a été annulé entre-temps."""
+        return set(
+            Live.objects.filter(id__in=armed_ids)
+            .exclude(status="starting")
+            .values_list("id", flat=True)
+        )
+
+    @staticmethod
+    def _prewarm(live):
+        """Met la vidéo en cache et teste les serveurs RTMP avant l'heure.
+
+        Retourne les erreurs de connexion (non bloquantes: un serveur peut
+        redevenir joignable d'ici le lancement).
+        """
+        warm_page_cache(ffmpeg.input_path(live))
+        errors = []
+        for stream_key in live.get_destinations():
+            try:
+                ffmpeg.check_rtmp_endpoint(stream_key.key)
+            except (OSError, ValueError) as e:
+                errors.append(f"{stream_key.name}: {e}")
+        return errors
+
+    @staticmethod
+    def _abandoned_ids(owned_ids):
+        """Lives possédés qui ne sont plus en cours: arrêt demandé, ou live
+        supprimé (directement ou avec son utilisateur)."""
+        wanted = Live.objects.filter(
+            id__in=owned_ids, status__in=["starting", "running"]
+        ).values_list("id", flat=True)
+        return set(owned_ids) - set(wanted)
+
+    def _complete_idle_stops(self, owned_ids):
+        """Termine les lives du nœud arrêtés avant d'avoir un processus."""
+        return states.transition(
+            Live.objects.filter(node=self.node).exclude(id__in=owned_ids),
+            "completed",
+            ["stopping"],
+            ffmpeg_pid=None,
+        )
+
+    @staticmethod
+    def _mark_running(live_id, pid, mode):
+        return states.transition(
+            live_id, "running", ["starting"], ffmpeg_pid=pid, delivery_mode=mode
+        )
+
+    @staticmethod
+    def _mark_restarting(live_id):
+        return states.transition(live_id, "starting", ["running"], ffmpeg_pid=None)
+
+    @staticmethod
+    def _mark_failed(live_id, from_statuses=("starting", "running")):
+        return states.transition(live_id, "failed", from_statuses, ffmpeg_pid=None)
+
+    @staticmethod
+    def _mark_stopped(live_id):
+        """Fin du processus d'un live arrêté: ``stopping`` devient ``completed``."""
+        if not states.transition(live_id, "completed", ["stopping"], ffmpeg_pid=None):
+            Live.objects.filter(id=live_id).update(ffmpeg_pid=None)
+
+    @staticmethod
+    def _save_samples(samples):
+        """Enregistre les mesures (purgées par ``tasks.prune_health_samples``)."""
+        StreamHealthSample.objects.bulk_create(
+            [StreamHealthSample(live_id=live_id, **data) for live_id, data in samples]
+        )
+
+    def _save_cpu_costs(self, costs):
+        """Met à jour la moyenne glissante du coût CPU de chaque profil."""
+        for profile in EncoderProfile.objects.filter(id__in=costs):
+            measures = costs[profile.id]
+            measured = sum(measures) / len(measures)
+            if profile.measured_cpu is not None:
+                measured = (
+                    self.cpu_smoothing * measured
+                    + (1 - self.cpu_smoothing) * profile.measured_cpu
+                )
+            EncoderProfile.objects.filter(id=profile.id).update(
+                measured_cpu=round(measured, 1)
+            )
+
+    # -- Cycle de vie des processus --
+
+    async def prepare(self, live):
+        """Profil, mode de diffusion et commande FFmpeg d'un live."""
+        profile_id = await sync_to_async(self._profile_id)(live)
+        mode = await sync_to_async(ffmpeg.delivery_mode)(live)
+        command = await sync_to_async(ffmpeg.build_stream_command)(live)
+        return profile_id, mode, ffmpeg.with_progress(command)
+
+    async def arm(self, live):
+        """Prépare un live programmé puis le lance à ``start_at`` précise."""
+        try:
+            try:
+                prepared = await self.prepare(live)
+                errors = await sync_to_async(self._prewarm)(live)
+            except Exception as e:
+                self.log(f"Live {live.id}: échec de la préparation ({e})")
+                await sync_to_async(self._mark_failed)(live.id)
+                self.notify(send_error_notification, live.id, str(e))
+                return
+            for error in errors:
+                self.log(f"Live {live.id}: serveur RTMP injoignable ({error})")
+            if errors:
+                self.notify(send_error_notification, live.id, "\n".join(errors))
+
+            delay = (live.start_at - timezone.now()).total_seconds()
+            self.log(f"Live {live.id}: prêt, lancement dans {max(delay, 0):.1f}s")
+            await asyncio.sleep(max(delay, 0))
+            # Une annulation pendant le lancement ne doit pas laisser un
+            # processus démarré sans surveillance
+            await asyncio.shield(self.spawn(live, prepared))
+        finally:
+            # Jamais laissé dans ``armed``: le live ne démarrerait plus
+            self.armed.pop(live.id, None)
+
+    async def spawn(self, live, prepared=None):
+        """Démarre FFmpeg pour un live et lance sa surveillance."""
+        try:
+            profile_id, mode, command = prepared or await self.prepare(live)
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **ffmpeg.process_group_kwargs(),
+            )
+        except (OSError, ValueError) as e:
+            self.log(f"Live {live.id}: échec du démarrage ({e})")
+            await sync_to_async(self._mark_failed)(live.id)
+            self.notify(send_error_notification, live.id, str(e))
+            return
+
+        stream = ManagedStream(live.id, process, profile_id, live.user_id)
+        self.streams[live.id] = stream
+
+        if not await sync_to_async(self._mark_running)(live.id, process.pid, mode):
+            # Arrêt demandé entre-temps
+            stream.request_stop()
+        elif not self.restart_attempts[live.id]:
+            self.notify(send_admin_notification, live.id)
+
+        self.log(f"Live {live.id}: FFmpeg démarré (PID {process.pid})")
+        stream.watcher = asyncio.create_task(self.watch(stream))
+
+    async def drain(self, reader, on_line=None):
+        """Vide un pipe en continu pour que FFmpeg ne bloque jamais en écriture.
+
+        Lecture par blocs: les lignes de statut de FFmpeg se terminent par
+        ``\\r`` et ne conviennent pas à ``readline``.
+        """
+        pending = b""
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                return
+            if on_line is None:
+                continue
+            *lines, pending = (pending + chunk).replace(b"\r", b"\n").split(b"\n")
+            for line in lines:
+                if line.strip():
+                    on_line(line.decode(errors="replace").rstrip())
+            pending = pending[-4096:]
+
+    async def watch(self, stream):
+        """Attend la fin du processus puis décide de le relancer ou non."""
+        process = stream.process
+        await asyncio.gather(
+            self.drain(process.stdout, stream.progress.feed),
+            self.drain(process.stderr, stream.stderr_tail.append),
+        )
+        returncode = await process.wait()
+        self.streams.pop(stream.live_id, None)
+
+        if self._stopping:
+            return
+
+        live_id = stream.live_id
+        # Un processus resté stable assez longtemps remet le compteur à zéro
+        previous = (
+            0 if stream.uptime >= self.stable_uptime else self.restart_attempts[live_id]
+        )
+        attempt = previous + 1
+
+        # Un live toujours ``running`` ne devait pas s'arrêter: relance ou
+        # abandon, décidés (et délai posé) avant la transition, qu'un
+        # ``poll`` concurrent verra aussitôt
+        if attempt > self.max_restarts:
+            if await sync_to_async(self._mark_failed)(live_id, ["running"]):
+                self.log(f"Live {live_id}: abandon après {previous} relances")
+                self.restart_attempts.pop(live_id, None)
+                self.notify(
+                    send_error_notification,
+                    live_id,
+                    "\n".join(stream.stderr_tail) or f"code {returncode}",
+                )
+                return
+        else:
+            delay = min(self.backoff_max, self.backoff_base**attempt)
+            self.restart_at[live_id] = time.monotonic() + delay
+            if await sync_to_async(self._mark_restarting)(live_id):
+                self.restart_attempts[live_id] = attempt
+                self.log(
+                    f"Live {live_id}: FFmpeg sorti (code {returncode}), "
+                    f"relance {attempt}/{self.max_restarts} dans {delay:.0f}s"
+                )
+                return
+            self.restart_at.pop(live_id, None)
+
+        self.log(f"Live {live_id}: arrêté (code {returncode})")
+        await sync_to_async(self._mark_stopped)(live_id)
+        self.restart_attempts.pop(live_id, None)
+
+    async def heartbeat(self):
+        if time.monotonic() - self.last_heartbeat < self.heartbeat_interval:
+            return
+        await sync_to_async(self._heartbeat)()
+        self.last_heartbeat = time.monotonic()
+
+    async def poll(self):
+        """Démarre les lives en attente et arrête ceux qui ne sont plus voulus."""
+        # Les lives en file passent en démarrage dès que la capacité le permet
+        for live_id in await sync_to_async(admission.admit_queued)():
+            self.log(f"Live {live_id}: admis depuis la file d'attente")
+
+        now = time.monotonic()
+        waiting = [live_id for live_id, when in self.restart_at.items() if when > now]
+        for live in await sync_to_async(self._lives_to_start)(
+            list(self.streams) + list(self.armed) + waiting
+        ):
+            self.restart_at.pop(live.id, None)
+            if live.start_at and live.start_at > timezone.now():
+                self.armed[live.id] = asyncio.create_task(self.arm(live))
+            else:
+                await self.spawn(live)
+
+        if self.armed:
+            for live_id in await sync_to_async(self._cancelled_ids)(list(self.armed)):
+                self.log(f"Live {live_id}: démarrage programmé annulé")
+                self.armed.pop(live_id).cancel()
+
+        if self.streams:
+            for live_id in await sync_to_async(self._abandoned_ids)(list(self.streams)):
+                stream = self.streams.get(live_id)
+                if stream and stream.process.returncode is None:
+                    stream.request_stop()
+        self.escalate_stops()
+        await sync_to_async(self._complete_idle_stops)(list(self.streams))
+
+    def escalate_stops(self):
+        """SIGKILL aux groupes FFmpeg encore vivants après ``stop_timeout``."""
+        now = time.monotonic()
+        for stream in self.streams.values():
+            if (
+                stream.stop_requested_at is None
+                or stream.process.returncode is not None
+            ):
+                continue
+            if now - stream.stop_requested_at >= self.stop_timeout:
+                self.log(f"Live {stream.live_id}: arrêt forcé (SIGKILL)")
+                stream.signal_group(SIGKILL)
+                stream.stop_requested_at = now  # Nouvel essai si besoin
+
+    async def record_health(self):
+        """Échantillonne la dernière mesure ``-progress`` de chaque live et
+        le CPU réellement consommé par profil, utilisé par l'admission."""
+        now = time.monotonic()
+        samples = []
+        cpu_costs = collections.defaultdict(list)
+        for stream in self.streams.values():
+            latest = stream.progress.latest
+            if not latest or now - stream.last_sample_at < self.sample_interval:
+                continue
+            samples.append((stream.live_id, latest))
+            stream.last_sample_at = now
+            if stream.ps and stream.profile_id and stream.uptime >= self.cpu_warmup:
+                try:
+                    cpu_costs[stream.profile_id].append(stream.ps.cpu_percent(None))
+                except psutil.Error:
+                    pass
+        if samples:
+            await sync_to_async(self._save_samples)(samples)
+            owners = {
+                live_id: self.streams[live_id].user_id
+                for live_id, _ in samples
+                if live_id in self.streams
+            }
+            await sync_to_async(events.publish_many)(
+                [
+                    (owners[live_id], "health", {"live_id": live_id, **data})
+                    for live_id, data in samples
+                    if live_id in owners
+                ]
+            )
+            # Santé affichée dans la liste des lives en cache
+            await sync_to_async(fragments.invalidate)("lives", owners.values())
+        if cpu_costs:
+            await sync_to_async(self._save_cpu_costs)(cpu_costs)
+
+    async def run(self):
+        self.node = await sync_to_async(self._register_node)()
+        recovered = await sync_to_async(self._recover_running_lives)()
+        if recovered:
+            self.log(f"{recovered} live(s) repris sous supervision")
+
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        if not sys.platform.startswith("win"):
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, stop.set)
+
+        self.log(f"Superviseur démarré sur le nœud {self.node_name}")
+        while not stop.is_set():
+            try:
+                await self.heartbeat()
+                await self.poll()
+                await self.record_health()
+            except Exception as e:  # Ne jamais laisser tomber les lives en cours
+                self.log(f"Erreur de supervision: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await self.shutdown()
+
+    async def shutdown(self):
+        """Arrêt du superviseur: les lives repartiront à son redémarrage."""
+        self._stopping = True
+        self.log(f"Arrêt du superviseur ({len(self.streams)} live(s) en cours)")
+        for task in self.armed.values():
+            task.cancel()
+        # Plus aucun nouveau live ne doit être placé sur ce nœud
+        await sync_to_async(self._leave_node)()
+        for stream in list(self.streams.values()):
+            stream.signal_group(signal.SIGTERM)
+        if self.streams:
+            await asyncio.wait(
+                [
+                    asyncio.ensure_future(s.process.wait())
+                    for s in self.streams.values()
+                ],
+                timeout=10,
+            )
+        for stream in list(self.streams.values()):
+            if stream.process.returncode is None:
+                stream.signal_group(SIGKILL)
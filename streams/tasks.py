@@ -1,20 +1,23 @@
 import subprocess
 import os
+import uuid
 import signal
 import sys
-from celery import shared_task
+from datetime import datetime, timedelta
+from celery import current_app, shared_task
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils import timezone
-from .models import Live
+from . import admission, assets, events, ffmpeg, fragments, states
+from .models import Live, StreamHealthSample
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
 @shared_task
-def start_live_stream(live_id):
-    """Démarre un live en utilisant FFmpeg."""
+def start_live_stream(live_id, start_at=None):
+    """Confie le démarrage d'un live au superviseur FFmpeg (à ``start_at``)."""
     try:
         live = Live.objects.get(id=live_id)
 
@@ -25,62 +28,16 @@ def start_live_stream(live_id):
         if not live.user.is_approved:
             return False
 
-        # Chemin vers FFmpeg
-        ffmpeg_path = getattr(settings, "FFMPEG_PATH", "ffmpeg")
-
-        # Commande FFmpeg pour YouTube Live
-        command = [
-            ffmpeg_path,
-            "-re",  # Lire à la vitesse réelle
-            "-i",
-            live.video_file.path,  # Fichier d'entrée
-            "-c:v",
-            "libx264",  # Codec vidéo
-            "-preset",
-            "ultrafast",  # Preset pour streaming
-            "-tune",
-            "zerolatency",  # Optimisation latence
-            "-c:a",
-            "aac",  # Codec audio
-            "-b:a",
-            "128k",  # Bitrate audio
-            "-f",
-            "flv",  # Format de sortie
-            f"rtmp://a.rtmp.youtube.com/live2/{live.stream_key}",  # URL YouTube
-        ]
-
-        # Démarrer le processus FFmpeg (compatible Windows et Linux)
-        if sys.platform.startswith("win"):
-            # Windows: utiliser subprocess.Popen avec creationflags
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-            )
-        else:
-            # Linux/Unix: utiliser subprocess.Popen normal
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True,  # Créer une nouvelle session
-            )
-
-        # Sauvegarder le PID
-        live.ffmpeg_pid = process.pid
-        live.status = "running"
-        live.save()
-
-        # Notification admin
-        send_admin_notification.delay(live_id)
+        if not live.stream_key:
+            return False
 
-        return True
+        # Même file d'admission que les démarrages manuels; le superviseur
+        # démarre FFmpeg et notifie les admins
+        return admission.request_start(live, start_at) is not None
 
     except Exception as e:
         # En cas d'erreur
-        live.status = "failed"
-        live.save()
+        states.transition(live_id, "failed", ["pending"])
 
         # Notification d'erreur
         send_error_notification.delay(live_id, str(e))
@@ -90,37 +47,166 @@ def start_live_stream(live_id):
 
 @shared_task
 def stop_live_stream(live_id):
-    """Arrête un live en cours."""
-    try:
-        live = Live.objects.get(id=live_id)
+    """Arrête un live en arrêt (voir ``stop_live_streams``)."""
+    return bool(stop_live_streams([live_id]))
 
-        if live.status != "running" or not live.ffmpeg_pid:
-            return False
 
-        # Arrêt du processus FFmpeg selon la plateforme
+@shared_task
+def stop_live_streams(live_ids):
+    """Envoie SIGTERM aux groupes de processus FFmpeg de lives en arrêt.
+
+    Exécutée par le worker du nœud qui possède les lives (file
+    ``node.<nom>``, voir ``dispatch_stops``): leurs PID n'ont de sens que sur
+    ce serveur. Le superviseur force l'arrêt (SIGKILL) après
+    ``SUPERVISOR_STOP_TIMEOUT`` et passe les lives à ``completed`` à la fin
+    de leur processus; un live sans processus est terminé par le superviseur.
+    """
+    pids = Live.objects.filter(
+        id__in=live_ids, status="stopping", ffmpeg_pid__isnull=False
+    ).values_list("ffmpeg_pid", flat=True)
+    stopped = 0
+    for pid in pids:
+        # Arrêt de tout le groupe de processus FFmpeg selon la plateforme
         try:
             if sys.platform.startswith("win"):
-                # Windows: utiliser taskkill
                 subprocess.run(
-                    ["taskkill", "/F", "/PID", str(live.ffmpeg_pid)],
+                    ["taskkill", "/F", "/T", "/PID", str(pid)],
                     capture_output=True,
                     timeout=10,
                 )
             else:
-                # Linux/Unix: utiliser os.kill
-                os.kill(live.ffmpeg_pid, signal.SIGKILL)
+                os.killpg(pid, signal.SIGTERM)
+            stopped += 1
         except (ProcessLookupError, subprocess.TimeoutExpired):
             pass  # Le processus n'existe plus
+    return stopped
+
+
+def dispatch_stop(live):
+    """Envoie l'arrêt d'un live (passé à ``stopping``) au worker du nœud qui
+    le diffuse."""
+    queue = live.node.queue_name if live.node_id else None
+    # Pas de nouvel essai si le broker est indisponible, et connexions bornées
+    # (CELERY_BROKER_CONNECTION_TIMEOUT, backend de résultats): la requête
+    # n'attend pas, le superviseur arrête le live de lui-même
+    return stop_live_stream.apply_async((live.id,), queue=queue, retry=False)
+
+
+def dispatch_stops(live_ids):
+    """Envoie l'arrêt de plusieurs lives: un message par nœud de diffusion."""
+    by_queue = {}
+    lives = Live.objects.filter(id__in=live_ids).select_related("node")
+    for live in lives.only("id", "node__name"):
+        queue = live.node.queue_name if live.node_id else None
+        by_queue.setdefault(queue, []).append(live.id)
+    for queue, ids in by_queue.items():
+        stop_live_streams.apply_async((ids,), queue=queue, retry=False)
+    return len(by_queue)
+
+
+# Acquittée à la réception: un transcodage dépasse le visibility_timeout de
+# Redis et serait sinon redistribué à un second worker en plein encodage.
+@shared_task(acks_late=False)
+def prepare_stream_rendition(live_id):
+    """Encode une seule fois la vidéo en FLV prêt à diffuser.
+
+    Le rendu suit le profil d'encodage du live; il peut ensuite être relayé
+    avec ``-c copy`` sans réencodage, quelle que soit la durée de la
+    diffusion en boucle. Pour une vidéo partagée (``VideoAsset``), le rendu
+    est commun à tous les lives de mêmes paramètres et n'est encodé qu'une
+    fois. La tâche est routée
+    sur la file ``transcode`` (voir ``CELERY_TASK_ROUTES``) et fait passer
+    le live de ``processing`` à ``pending`` une fois le rendu prêt.
+    """
+    try:
+        live = Live.objects.select_related("video_asset").get(id=live_id)
+    except Live.DoesNotExist:
+        return False
+    if live.status != "processing":
+        return False  # Déjà rendu (envoi en double, voir requeue_stale_renditions)
+
+    source_path = live.video_file.path
+    duration = None
+    if live.video_asset:
+        # Fichier illisible: échec immédiat plutôt qu'en pleine diffusion
+        asset = assets.probe(live.video_asset)
+        if asset.probe_error:
+            print(f"[DEBUG] Vidéo illisible ({live_id}): {asset.probe_error}")
+            states.transition(live_id, "failed", ["processing"])
+            send_error_notification.delay(
+                live_id, f"Vidéo illisible: {asset.probe_error}"
+            )
+            return False
+        duration = asset.duration
+
+        # Source déjà compatible: diffusée telle quelle, sans rendu
+        if ffmpeg.can_remux(live):
+            Live.objects.filter(id=live_id).update(
+                delivery_mode="remux",
+                stream_file="",
+                processing_progress=100,
+                updated_at=timezone.now(),
+            )
+            states.transition(live_id, "pending", ["processing"])
+            _start_if_due(live_id)
+            return True
+
+    profile = ffmpeg.resolve_profile(live)
+    if live.video_asset:
+        rendition_name = live.video_asset.rendition_name(ffmpeg.encoding_key(profile))
+    else:
+        base_name = os.path.splitext(live.video_file.name)[0]
+        rendition_name = f"{base_name}.stream.flv"
+    rendition_path = os.path.join(settings.MEDIA_ROOT, rendition_name)
+    # Fichier temporaire propre à chaque exécution: deux rendus concurrents
+    # de la même vidéo n'écrivent jamais dans le même fichier
+    tmp_path = f"{rendition_path}.{live_id}.{uuid.uuid4().hex}.part"
+
+    if live.video_asset and os.path.exists(rendition_path):
+        # Rendu déjà produit pour un autre live de la même vidéo
+        return _rendition_ready(live_id, rendition_name)
+
+    # Paramètres du profil du live, encodés une seule fois hors ligne
+    command = ffmpeg.build_rendition_command(live, tmp_path, profile)
+
+    def report_progress(percent):
+        # updated_at sert de signe de vie (voir requeue_stale_renditions)
+        Live.objects.filter(id=live_id).update(
+            processing_progress=percent, updated_at=timezone.now()
+        )
+        fragments.invalidate("lives", [live.user_id])
+        events.publish(
+            live.user_id, "progress", {"live_id": live_id, "percent": percent}
+        )
+
+    try:
+        ffmpeg.run_with_progress(
+            command,
+            duration=duration or ffmpeg.probe_duration(source_path),
+            on_progress=report_progress,
+        )
+        os.replace(tmp_path, rendition_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"[DEBUG] Échec du rendu du live {live_id}: {e}")
+        states.transition(live_id, "failed", ["processing"])
+        send_error_notification.delay(live_id, f"Préparation de la vidéo: {e}")
+        return False
 
-        # Mise à jour du statut
-        live.status = "completed"
-        live.ffmpeg_pid = None
-        live.save()
+    return _rendition_ready(live_id, rendition_name)
 
-        return True
 
-    except Exception:
-        return False
+def _rendition_ready(live_id, rendition_name):
+    Live.objects.filter(id=live_id).update(
+        stream_file=rendition_name,
+        delivery_mode="rendition",
+        processing_progress=100,
+        updated_at=timezone.now(),
+    )
+    states.transition(live_id, "pending", ["processing"])
+    _start_if_due(live_id)
+    return True
 
 
 @shared_task
@@ -186,15 +272,149 @@ def send_error_notification(live_id, error_message):
         pass  # Ignorer les erreurs de notification
 
 
+@shared_task
+def start_scheduled_live(live_id, scheduled_at):
+    """Admet un live programmé ``SCHEDULE_PREWARM`` secondes avant son heure.
+
+    Le fichier est vérifié maintenant plutôt qu'au démarrage; le superviseur
+    du nœud choisi charge ensuite la vidéo en cache, teste les serveurs RTMP,
+    prépare la commande et lance FFmpeg à ``scheduled_at`` précise.
+
+    ``scheduled_at`` est l'horaire connu lors de l'envoi: une tâche devenue
+    obsolète (live reprogrammé, supprimé ou déjà démarré) ne fait rien,
+    même si sa révocation n'a pas atteint le worker.
+    """
+    live = Live.objects.filter(id=live_id, is_scheduled=True).first()
+    if live is None or live.scheduled_at is None:
+        return False
+    # Comparaison des instants: la base renvoie l'heure en UTC, la tâche
+    # a pu être envoyée avec celle du formulaire (Europe/Paris)
+    try:
+        expected = datetime.fromisoformat(scheduled_at)
+    except (TypeError, ValueError):
+        return False
+    if live.scheduled_at != expected:
+        return False
+
+    Live.objects.filter(id=live_id).update(schedule_task_id="")
+    if live.status != "pending":
+        # Encore en préparation: démarré dès que le rendu est prêt
+        return False
+
+    try:
+        path = ffmpeg.input_path(live)
+    except ValueError:
+        path = None
+    if not path or not os.path.exists(path):
+        states.transition(live_id, "failed", ["pending"])
+        send_error_notification.delay(
+            live_id, f"Vidéo introuvable avant le démarrage programmé: {path}"
+        )
+        return False
+
+    return start_live_stream(live_id, live.scheduled_at)
+
+
+def schedule_live(live):
+    """(Re)planifie le démarrage d'un live programmé.
+
+    Seuls les lives proches (``SCHEDULE_HORIZON``) reçoivent une tâche avec
+    ``eta``; les autres sont planifiés plus tard par ``check_scheduled_lives``,
+    ce qui évite de garder des milliers de tâches en attente dans les workers.
+    """
+    unschedule_live(live)
+    if not (live.is_scheduled and live.scheduled_at):
+        return None
+    if live.status not in ("processing", "pending"):
+        return None
+    horizon = timezone.now() + timedelta(seconds=settings.SCHEDULE_HORIZON)
+    if live.scheduled_at > horizon:
+        return None
+
+    # Admission en avance: FFmpeg est prêt à partir à l'heure exacte
+    eta = live.scheduled_at - timedelta(seconds=settings.SCHEDULE_PREWARM)
+    result = start_scheduled_live.apply_async(
+        (live.id, live.scheduled_at.isoformat()), eta=eta
+    )
+    Live.objects.filter(id=live.id).update(schedule_task_id=result.id)
+    live.schedule_task_id = result.id
+    return result.id
+
+
+def unschedule_live(live):
+    """Révoque la tâche de démarrage programmée d'un live."""
+    if not live.schedule_task_id:
+        return
+    current_app.control.revoke(live.schedule_task_id)
+    Live.objects.filter(id=live.id).update(schedule_task_id="")
+    live.schedule_task_id = ""
+
+
+def _start_if_due(live_id):
+    """Démarre un live programmé dont l'heure est passée pendant sa préparation."""
+    if Live.objects.filter(
+        id=live_id,
+        is_scheduled=True,
+        status="pending",
+        scheduled_at__lte=timezone.now(),
+    ).exists():
+        start_live_stream(live_id)
+
+
 @shared_task
 def check_scheduled_lives():
-    """Vérifie et démarre les lives programmés."""
+    """Balayage de réconciliation des lives programmés (voir CELERY_BEAT_SCHEDULE).
+
+    Les démarrages passent par ``start_scheduled_live``; ce balayage peu
+    fréquent planifie les lives entrant dans l'horizon et démarre ceux dont
+    la tâche a été perdue.
+    """
     now = timezone.now()
 
-    # Trouver les lives programmés à démarrer
-    scheduled_lives = Live.objects.filter(
+    # Lives échus mais non démarrés
+    overdue = Live.objects.filter(
         is_scheduled=True, status="pending", scheduled_at__lte=now
+    ).values_list("id", flat=True)
+    for live_id in overdue:
+        start_live_stream.delay(live_id)
+
+    # Lives proches sans tâche de démarrage
+    upcoming = Live.objects.filter(
+        is_scheduled=True,
+        status__in=["processing", "pending"],
+        scheduled_at__gt=now,
+        scheduled_at__lte=now + timedelta(seconds=settings.SCHEDULE_HORIZON),
+        schedule_task_id="",
     )
+    for live in upcoming:
+        schedule_live(live)
+
+
+@shared_task
+def requeue_stale_renditions():
+    """Renvoie les rendus sans progression depuis ``TRANSCODE_STALE_TIMEOUT``.
+
+    ``prepare_stream_rendition`` est acquittée à la réception: un worker
+    arrêté en plein encodage laisserait sinon le live en ``processing``.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TRANSCODE_STALE_TIMEOUT)
+    stale = Live.objects.filter(status="processing", updated_at__lt=cutoff)
+    requeued = 0
+    for live_id in stale.values_list("id", flat=True):
+        # Revendiqué par un UPDATE conditionnel: un seul renvoi par délai
+        if Live.objects.filter(
+            id=live_id, status="processing", updated_at__lt=cutoff
+        ).update(updated_at=timezone.now()):
+            print(f"[DEBUG] Rendu du live {live_id} relancé")
+            prepare_stream_rendition.delay(live_id)
+            requeued += 1
+    return requeued
+
 
-    for live in scheduled_lives:
-        start_live_stream.delay(live.id)
+@shared_task
+def prune_health_samples():
+    """Supprime les mesures de santé plus anciennes que ``HEALTH_RETENTION``
+    (une fois par ``HEALTH_PRUNE_INTERVAL``, pour tous les nœuds)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.HEALTH_RETENTION)
+    deleted, _ = StreamHealthSample.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
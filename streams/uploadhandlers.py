@@ -0,0 +1,97 @@
+"""
+Gestionnaire d'upload des vidéos de LiveManager.
+
+La vidéo est écrite pendant sa réception dans un fichier temporaire de
+``MEDIA_ROOT/videos`` : à l'enregistrement du live, le stockage la renomme
+à sa place définitive (même système de fichiers, sans seconde copie).
+L'empreinte SHA-256 et la taille sont calculées au passage, et l'upload est
+interrompu dès que la taille maximale est dépassée.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    StopFutureHandlers,
+    StopUpload,
+)
+
+
+class HashedUploadedFile(UploadedFile):
+    """Vidéo reçue dans ``videos/``, avec son empreinte SHA-256."""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        directory = os.path.join(settings.MEDIA_ROOT, "videos")
+        os.makedirs(directory, exist_ok=True)
+        _, ext = os.path.splitext(name)
+        # Supprimé à la fermeture s'il n'a pas été renommé entre-temps
+        file = tempfile.NamedTemporaryFile(suffix=".upload" + ext, dir=directory)
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = None
+
+    def temporary_file_path(self):
+        """Chemin du fichier: le stockage le renomme au lieu de le copier."""
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            pass  # Déjà renommé à sa place définitive
+
+
+class VideoUploadHandler(FileUploadHandler):
+    """Reçoit le champ ``video_file`` directement dans le stockage des vidéos.
+
+    Les autres fichiers éventuels sont laissés aux gestionnaires suivants.
+    ``too_large`` indique un upload interrompu pour dépassement de taille.
+    """
+
+    # ``field_name`` est réaffecté par ``new_file`` au champ en cours
+    video_field = "video_file"
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or settings.VIDEO_UPLOAD_MAX_SIZE
+        self.active = False
+        self.too_large = False
+        self.received = 0
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.active = field_name == self.video_field
+        if not self.active:
+            return
+        self.file = HashedUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self.hash = hashlib.sha256()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        self.received = start + len(raw_data)
+        if self.received > self.max_size:
+            # Inutile de lire la suite du corps de la requête
+            self.too_large = True
+            raise StopUpload(connection_reset=True)
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hash.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
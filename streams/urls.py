@@ -14,8 +14,23 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
     # Dashboard utilisateur
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("dashboard/lives/", views.dashboard_lives, name="dashboard_lives"),
     path("profile/", views.profile, name="profile"),
     path("create-live/", views.create_live, name="create_live"),
+    # Upload reprenable des vidéos
+    path("uploads/", views.create_upload, name="create_upload"),
+    path("uploads/<uuid:upload_id>/", views.upload_session, name="upload_session"),
+    path(
+        "uploads/<uuid:upload_id>/finalize/",
+        views.finalize_upload,
+        name="finalize_upload",
+    ),
+    path("videos/check/", views.check_video_asset, name="check_video_asset"),
+    path(
+        "videos/<str:sha256>/live/",
+        views.create_live_from_asset,
+        name="create_live_from_asset",
+    ),
     # Gestion des clés de streaming
     path("add-stream-key/", views.add_stream_key, name="add_stream_key"),
     path(
@@ -35,6 +50,8 @@ urlpatterns = [
     path("live/<int:live_id>/start/", views.start_live, name="start_live"),
     path("live/<int:live_id>/stop/", views.stop_live, name="stop_live"),
     path("live/<int:live_id>/restart/", views.restart_live, name="restart_live"),
+    path("live/<int:live_id>/health/", views.live_health, name="live_health"),
+    path("events/", views.live_events, name="live_events"),
     # Vérification du statut
     path(
         "check-approval-status/",
@@ -43,7 +60,9 @@ urlpatterns = [
     ),
     # Dashboard admin
     path("admin-dashboard/", views.admin_dashboard, name="admin_dashboard"),
+    path("admin-lives/bulk/", views.admin_bulk_lives, name="admin_bulk_lives"),
     path("admin-users/", views.admin_users, name="admin_users"),
+    path("admin-cache-stats/", views.admin_cache_stats, name="admin_cache_stats"),
     path("approve-user/<int:user_id>/", views.approve_user, name="approve_user"),
     path("reject-user/<int:user_id>/", views.reject_user, name="reject_user"),
     path("toggle-admin/<int:user_id>/", views.toggle_admin, name="toggle_admin"),
@@ -1,15 +1,38 @@
 import os
-import sys
-import subprocess
+from datetime import timedelta
+import redis
+
+try:
+    import fcntl
+except ImportError:  # Windows: l'offset est seulement revérifié en base
+    fcntl = None
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Q, Subquery
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.contrib.auth import SESSION_KEY
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-from django.views.decorators.http import require_POST
-from django.conf import settings
-from .forms import UserRegistrationForm, LiveForm, StreamKeyForm
-from .models import User, Live, StreamKey
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from .forms import UserRegistrationForm, LiveForm, StreamKeyForm, UploadedLiveForm
+from .models import (
+    User,
+    Live,
+    StreamKey,
+    StreamHealthSample,
+    StreamNode,
+    UploadSession,
+)
+from . import admission, assets, bulk, events, fragments, pagination, states, stats
+from .tasks import dispatch_stop, prepare_stream_rendition, schedule_live
+from .uploadhandlers import VideoUploadHandler
 
 
 def is_admin(user):
@@ -17,6 +40,28 @@ def is_admin(user):
     return user.is_authenticated and user.is_admin
 
 
+def _admission_response(live, started_message):
+    """Demande le démarrage d'un live et traduit la décision d'admission."""
+    decision = admission.request_start(live)
+    print(f"[DEBUG] Admission du live {live.id}: {decision}")
+
+    if decision == "starting":
+        return JsonResponse({"success": True, "message": started_message})
+    if decision == "queued":
+        return JsonResponse(
+            {
+                "success": True,
+                "message": "Serveur à pleine capacité: live mis en file d'attente",
+            }
+        )
+    if decision is not None:
+        # Démarrage concurrent (double clic, démarrage programmé)
+        return JsonResponse({"success": False, "message": "Live déjà démarré"})
+    return JsonResponse(
+        {"success": False, "message": "Serveur saturé, réessayez plus tard"}
+    )
+
+
 def home(request):
     """Page d'accueil."""
     return render(request, "streams/home.html")
@@ -50,15 +95,59 @@ def logout_view(request):
     return redirect("home")
 
 
+def _selected_statuses(request):
+    """Statuts valides demandés par les paramètres ``status``."""
+    valid_statuses = dict(Live.STATUS_CHOICES)
+    return [s for s in request.GET.getlist("status") if s in valid_statuses]
+
+
+def _dashboard_page(request, statuses):
+    """Page de lives de l'utilisateur: filtres ``statuses`` et curseur ``after``.
+
+    Retourne ``(lives, curseur suivant)``; le coût en requêtes ne dépend ni
+    du nombre de lives affichés ni de la page.
+    """
+    latest_health = StreamHealthSample.objects.filter(live=OuterRef("pk"))
+    lives = (
+        Live.objects.filter(user=request.user)
+        .select_related("user", "stream_key", "video_asset")
+        .annotate(
+            health_speed=Subquery(latest_health.values("speed")[:1]),
+            health_fps=Subquery(latest_health.values("fps")[:1]),
+            health_bitrate=Subquery(latest_health.values("bitrate_kbps")[:1]),
+        )
+    )
+    if statuses:
+        lives = lives.filter(status__in=statuses)
+    return pagination.keyset_page(
+        lives, request.GET.get("after"), settings.DASHBOARD_PAGE_SIZE
+    )
+
+
 @login_required
 def dashboard(request):
     """Dashboard utilisateur."""
-    lives = Live.objects.filter(user=request.user).order_by("-created_at")
+    statuses = _selected_statuses(request)
+
+    def render_lives():
+        lives, next_cursor = _dashboard_page(request, statuses)
+        context = {
+            "lives": lives,
+            "is_approved": request.user.is_approved,
+            "user_lives": lives,  # Pour compatibilité avec le template
+            "next_cursor": next_cursor,
+            "is_first_page": not request.GET.get("after"),
+            "selected_statuses": statuses,
+        }
+        return render_to_string("streams/dashboard_lives.html", context, request)
 
     context = {
-        "lives": lives,
+        "lives_html": fragments.cached(
+            "lives", request.user.id, request.GET.urlencode(), render_lives
+        ),
         "is_approved": request.user.is_approved,
-        "user_lives": lives,  # Pour compatibilité avec le template
+        "status_choices": Live.STATUS_CHOICES,
+        "selected_statuses": statuses,
     }
 
     if not request.user.is_approved:
@@ -71,11 +160,69 @@ def dashboard(request):
     return render(request, "streams/dashboard.html", context)
 
 
+@login_required
+def dashboard_lives(request):
+    """Lives du dashboard en JSON, mêmes filtres et curseur que la page."""
+    lives, next_cursor = _dashboard_page(request, _selected_statuses(request))
+    return JsonResponse(
+        {
+            "lives": [
+                {
+                    "id": live.id,
+                    "title": live.title,
+                    "status": live.status,
+                    "label": live.get_status_display(),
+                    "created_at": live.created_at.isoformat(),
+                    "scheduled_at": (
+                        live.scheduled_at.isoformat()
+                        if live.is_scheduled and live.scheduled_at
+                        else None
+                    ),
+                    "stream_key": (
+                        {
+                            "name": live.stream_key.name,
+                            "platform": live.stream_key.platform,
+                        }
+                        if live.stream_key
+                        else None
+                    ),
+                    "health_speed": live.health_speed,
+                    "can_start": live.can_start,
+                    "can_stop": live.can_stop,
+                    "can_restart": live.can_restart,
+                }
+                for live in lives
+            ],
+            "next": next_cursor,
+        }
+    )
+
+
 @login_required
 def profile(request):
     """Profil utilisateur avec gestion des clés de streaming."""
-    stream_keys = StreamKey.objects.filter(user=request.user).order_by("-created_at")
-    return render(request, "streams/profile.html", {"user_stream_keys": stream_keys})
+
+    def render_stream_keys():
+        stream_keys = StreamKey.objects.filter(user=request.user).order_by(
+            "-created_at"
+        )
+        return render_to_string(
+            "streams/profile_stream_keys.html",
+            {"user_stream_keys": stream_keys},
+            request,
+        )
+
+    # Le fragment contient des jetons CSRF: il est propre au secret CSRF
+    # (renouvelé à chaque connexion) en plus de l'utilisateur
+    stream_keys_html = fragments.cached(
+        "stream_keys",
+        request.user.id,
+        request.META.get("CSRF_COOKIE", ""),
+        render_stream_keys,
+    )
+    return render(
+        request, "streams/profile.html", {"stream_keys_html": stream_keys_html}
+    )
 
 
 @login_required
@@ -137,9 +284,61 @@ def toggle_stream_key(request, key_id):
     return redirect("profile")
 
 
+def _schedule_rendition(live):
+    """Planifie le rendu prêt à diffuser d'un live en préparation, et son
+    démarrage s'il est programmé."""
+    try:
+        prepare_stream_rendition.delay(live.id)
+    except Exception as e:
+        # Pas de worker disponible: diffusion avec encodage direct
+        print(f"[DEBUG] Rendu non planifié ({live.id}): {e}")
+        states.transition(live, "pending", ["processing"])
+    try:
+        schedule_live(live)
+    except Exception as e:
+        # Rattrapé par le balayage check_scheduled_lives
+        print(f"[DEBUG] Démarrage programmé non planifié ({live.id}): {e}")
+
+
+# Marge pour les autres champs du formulaire multipart
+UPLOAD_FORM_OVERHEAD = 1024 * 1024
+
+
+def _upload_too_large(request, size):
+    error_msg = (
+        f"Fichier trop volumineux. Taille maximale: "
+        f"{settings.VIDEO_UPLOAD_MAX_SIZE / (1024 * 1024 * 1024):.2f}GB, "
+        f"reçu: {size / (1024 * 1024 * 1024):.2f}GB"
+    )
+    print(f"[DEBUG] {error_msg}")
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse({"success": False, "message": error_msg}, status=413)
+    messages.error(request, error_msg)
+    return redirect("dashboard")
+
+
 @login_required
+@csrf_exempt
 def create_live(request):
-    """Création d'un nouveau live avec upload HTTP optimisé."""
+    """Création d'un nouveau live avec upload HTTP optimisé.
+
+    La vidéo est écrite dans ``videos/`` pendant sa réception (voir
+    ``VideoUploadHandler``): le gestionnaire doit être installé avant que le
+    contrôle CSRF ne lise le corps de la requête.
+    """
+    handler = None
+    if request.method == "POST":
+        size = int(request.META.get("CONTENT_LENGTH") or 0)
+        if size > settings.VIDEO_UPLOAD_MAX_SIZE + UPLOAD_FORM_OVERHEAD:
+            # Refus avant d'avoir lu le moindre octet de la vidéo
+            return _upload_too_large(request, size)
+        handler = VideoUploadHandler(request)
+        request.upload_handlers.insert(0, handler)
+    return _create_live(request, handler)
+
+
+@csrf_protect
+def _create_live(request, handler=None):
     if not request.user.is_approved:
         messages.error(request, "Vous devez être approuvé pour créer un live.")
         return redirect("dashboard")
@@ -151,25 +350,16 @@ def create_live(request):
         print(f"[DEBUG] Fichiers reçus: {list(request.FILES.keys())}")
         print(f"[DEBUG] Données POST: {list(request.POST.keys())}")
 
-        # Vérifier la taille du fichier avant traitement
+        # Upload interrompu dès le dépassement de la taille maximale
+        if handler and handler.too_large:
+            return _upload_too_large(request, handler.received)
+
         if 'video_file' in request.FILES:
             video_file = request.FILES['video_file']
             print(f"[DEBUG] Fichier vidéo: {video_file.name}")
             print(f"[DEBUG] Taille du fichier: {video_file.size} bytes")
             print(f"[DEBUG] Type MIME: {video_file.content_type}")
-            
-            # Vérifier la taille maximale (1GB)
-            max_size = 1048576000  # 1GB
-            if video_file.size > max_size:
-                error_msg = (
-                    f"Fichier trop volumineux. Taille maximale: 1GB, "
-                    f"reçu: {video_file.size / (1024*1024*1024):.2f}GB"
-                )
-                print(f"[DEBUG] {error_msg}")
-                if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-                    return JsonResponse({"success": False, "message": error_msg})
-                messages.error(request, error_msg)
-                return redirect("dashboard")
+            print(f"[DEBUG] SHA-256: {getattr(video_file, 'sha256', None)}")
 
         try:
             form = LiveForm(request.POST, request.FILES, user=request.user)
@@ -186,9 +376,15 @@ def create_live(request):
                         video_file = request.FILES["video_file"]
                         print(f"[DEBUG] Sauvegarde du fichier vidéo: {video_file.name}")
 
-                        # Upload HTTP optimisé avec gestion des timeouts
-                        live.video_file = video_file
+                        # Une vidéo déjà connue n'est pas stockée deux fois
+                        assets.attach(
+                            live,
+                            assets.store_uploaded_file(video_file, video_file.sha256),
+                        )
+                        # Le live reste indisponible tant que le rendu n'est pas prêt
+                        live.status = "processing"
                         live.save()
+                        form.save_m2m()
                         
                         print(f"[DEBUG] Vidéo sauvegardée avec succès: {live.video_file.name}")
                         print(f"[DEBUG] Chemin complet: {live.video_file.path}")
@@ -201,6 +397,9 @@ def create_live(request):
                             print(f"[DEBUG] Taille du fichier sur disque: {file_size} bytes")
                         else:
                             print(f"[DEBUG] ATTENTION: Fichier non trouvé sur le disque: {live.video_file.path}")
+
+                        # Préparer le rendu prêt à diffuser en arrière-plan
+                        _schedule_rendition(live)
                         
                         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
                             return JsonResponse(
@@ -210,6 +409,7 @@ def create_live(request):
                                     "redirect_url": reverse("dashboard"),
                                     "file_path": live.video_file.name,
                                     "file_size": file_size if 'file_size' in locals() else video_file.size,
+                                    "sha256": getattr(video_file, "sha256", None),
                                 }
                             )
                         messages.success(request, "Vidéo uploadée avec succès !")
@@ -271,6 +471,253 @@ def create_live(request):
         return render(request, "streams/create_live.html", {"form": form})
 
 
+# Upload reprenable (protocole type tus): création de session, envoi des
+# morceaux par PATCH avec leur position, reprise par HEAD, puis finalisation.
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+def _upload_headers(response, upload):
+    response["Upload-Offset"] = str(upload.offset)
+    response["Upload-Length"] = str(upload.size)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def _purge_stale_uploads(user):
+    """Supprime les uploads abandonnés de l'utilisateur."""
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    for upload in UploadSession.objects.filter(user=user, updated_at__lt=cutoff):
+        upload.discard()
+
+
+@login_required
+@require_POST
+def create_upload(request):
+    """Ouvre une session d'upload reprenable pour une vidéo."""
+    if not request.user.is_approved:
+        return JsonResponse(
+            {"success": False, "message": "Utilisateur non approuvé"}, status=403
+        )
+
+    try:
+        size = int(request.headers.get("Upload-Length") or request.POST.get("size"))
+    except (TypeError, ValueError):
+        return JsonResponse(
+            {"success": False, "message": "Taille du fichier manquante"}, status=400
+        )
+    if size <= 0 or size > settings.VIDEO_UPLOAD_MAX_SIZE:
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Fichier trop volumineux. Taille maximale: "
+                f"{settings.VIDEO_UPLOAD_MAX_SIZE / (1024 * 1024 * 1024):.2f}GB",
+            },
+            status=413,
+        )
+
+    _purge_stale_uploads(request.user)
+    upload = UploadSession.objects.create(
+        user=request.user,
+        filename=os.path.basename(request.POST.get("filename", "")) or "video.mp4",
+        size=size,
+    )
+    os.makedirs(os.path.dirname(upload.part_path), exist_ok=True)
+    open(upload.part_path, "wb").close()
+    print(f"[DEBUG] Upload {upload.id} créé: {upload.filename} ({size} bytes)")
+
+    url = reverse("upload_session", args=[upload.id])
+    response = JsonResponse(
+        {"success": True, "upload_id": str(upload.id), "url": url, "offset": 0},
+        status=201,
+    )
+    response["Location"] = url
+    return _upload_headers(response, upload)
+
+
+@login_required
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def upload_session(request, upload_id):
+    """Progression (HEAD), envoi d'un morceau (PATCH) ou abandon (DELETE)."""
+    upload = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+
+    if request.method == "HEAD":
+        return _upload_headers(HttpResponse(), upload)
+
+    if request.method == "PATCH":
+        return _append_chunk(request, upload)
+
+    upload.discard()
+    return HttpResponse(status=204)
+
+
+def _append_chunk(request, upload):
+    """Ajoute le corps de la requête au fichier à partir de ``Upload-Offset``.
+
+    Aucune transaction n'est ouverte pendant la lecture du corps: deux PATCH
+    concurrents sont sérialisés par un verrou sur le fichier ``.part``, et
+    l'offset n'avance que s'il n'a pas changé entre-temps (UPDATE
+    conditionnel). Le second reçoit un 409 avec l'offset à jour.
+    """
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return _upload_headers(HttpResponse(status=400), upload)
+    if offset != upload.offset:
+        # Le client reprend depuis la position renvoyée
+        return _upload_headers(HttpResponse(status=409), upload)
+
+    try:
+        length = int(request.headers.get("Content-Length") or 0)
+    except ValueError:
+        length = 0
+    if offset + length > upload.size:
+        return _upload_headers(HttpResponse(status=413), upload)
+
+    # Le corps est lu par blocs et ajouté au fichier: la mémoire utilisée
+    # ne dépend pas de la taille du morceau
+    written = 0
+    too_large = False
+    with open(upload.part_path, "r+b") as part:
+        if fcntl:
+            fcntl.flock(part, fcntl.LOCK_EX)  # Libéré à la fermeture
+        # Offset relu sous le verrou: un PATCH concurrent a pu l'avancer
+        upload.offset = (
+            UploadSession.objects.filter(id=upload.id)
+            .values_list("offset", flat=True)
+            .first()
+        )
+        if upload.offset is None:
+            return HttpResponse(status=404)  # Upload abandonné entre-temps
+        if offset != upload.offset:
+            return _upload_headers(HttpResponse(status=409), upload)
+        part.seek(offset)
+        part.truncate()  # Octets d'un morceau interrompu non comptabilisés
+        try:
+            while True:
+                chunk = request.read(UPLOAD_READ_SIZE)
+                if not chunk:
+                    break
+                if offset + written + len(chunk) > upload.size:
+                    too_large = True
+                    break
+                part.write(chunk)
+                written += len(chunk)
+        except OSError as e:
+            # Connexion coupée: ce qui a été reçu reste acquis
+            print(f"[DEBUG] Upload {upload.id} interrompu à {offset + written}: {e}")
+
+        claimed = UploadSession.objects.filter(id=upload.id, offset=offset).update(
+            offset=offset + written, updated_at=timezone.now()
+        )
+    if not claimed:
+        # Offset avancé pendant la lecture (sans verrou de fichier) ou abandon
+        upload = UploadSession.objects.filter(id=upload.id).first()
+        if upload is None:
+            return HttpResponse(status=404)
+        return _upload_headers(HttpResponse(status=409), upload)
+    upload.offset = offset + written
+
+    if too_large:
+        return _upload_headers(HttpResponse(status=413), upload)
+    return _upload_headers(HttpResponse(status=204), upload)
+
+
+@login_required
+@require_POST
+def finalize_upload(request, upload_id):
+    """Crée le live à partir d'un upload terminé."""
+    upload = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+    form = UploadedLiveForm(request.POST, user=request.user, upload=upload)
+    if not form.is_valid():
+        print(f"[DEBUG] Formulaire invalide: {form.errors}")
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Erreur de validation: {form.errors}",
+                "errors": dict(form.errors),
+            }
+        )
+
+    live = form.save(commit=False)
+    live.user = request.user
+    assets.attach(live, assets.store_path(upload.part_path, upload.filename))
+    # Le live reste indisponible tant que le rendu n'est pas prêt
+    live.status = "processing"
+    live.save()
+    form.save_m2m()
+    upload.delete()
+    print(f"[DEBUG] Live {live.id} créé depuis l'upload {upload_id}")
+
+    _schedule_rendition(live)
+    return JsonResponse(
+        {
+            "success": True,
+            "message": "Vidéo uploadée avec succès !",
+            "redirect_url": reverse("dashboard"),
+            "file_path": live.video_file.name,
+            "file_size": upload.size,
+        }
+    )
+
+
+@login_required
+def check_video_asset(request):
+    """Indique si une vidéo (empreinte SHA-256 et taille) est déjà stockée:
+    le client peut alors créer le live sans l'envoyer."""
+    sha256 = request.GET.get("sha256", "").lower()
+    try:
+        size = int(request.GET.get("size", ""))
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Taille invalide"})
+    return JsonResponse(
+        {"success": True, "exists": assets.find(sha256, size) is not None}
+    )
+
+
+@login_required
+@require_POST
+def create_live_from_asset(request, sha256):
+    """Crée un live à partir d'une vidéo déjà stockée, sans nouvel envoi."""
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        size = None
+    asset = assets.find(sha256.lower(), size) if size is not None else None
+    if asset is None:
+        return JsonResponse({"success": False, "message": "Vidéo inconnue"}, status=404)
+
+    form = UploadedLiveForm(request.POST, user=request.user)
+    if not form.is_valid():
+        print(f"[DEBUG] Formulaire invalide: {form.errors}")
+        return JsonResponse(
+            {
+                "success": False,
+                "message": f"Erreur de validation: {form.errors}",
+                "errors": dict(form.errors),
+            }
+        )
+
+    live = form.save(commit=False)
+    live.user = request.user
+    assets.attach(live, asset)
+    live.status = "processing"
+    live.save()
+    form.save_m2m()
+    print(f"[DEBUG] Live {live.id} créé depuis la vidéo {asset.sha256[:12]}")
+
+    # Instantané si le rendu de cette vidéo existe déjà
+    _schedule_rendition(live)
+    return JsonResponse(
+        {
+            "success": True,
+            "message": "Vidéo déjà disponible, live créé !",
+            "redirect_url": reverse("dashboard"),
+            "file_path": live.video_file.name,
+            "file_size": asset.size,
+        }
+    )
+
+
 @login_required
 @require_POST
 def start_live(request, live_id):
@@ -291,96 +738,18 @@ def start_live(request, live_id):
         return JsonResponse({"success": False, "message": "Clé de streaming manquante"})
 
     try:
-        # Construire la commande FFmpeg
-        video_path = os.path.join("media", live.video_file.name)
-        if not os.path.exists(video_path):
-            print(f"[DEBUG] Fichier vidéo non trouvé: {video_path}")
+        if not os.path.exists(live.video_file.path):
+            print(f"[DEBUG] Fichier vidéo non trouvé: {live.video_file.path}")
             return JsonResponse(
                 {"success": False, "message": "Fichier vidéo non trouvé"}
             )
 
-        # Construire l'URL RTMP avec la clé de streaming
-        rtmp_url = live.stream_key.key
-
-        # Commande FFmpeg pour le streaming (sans setsid pour compatibilité Windows)
-        ffmpeg_path = getattr(settings, "FFMPEG_PATH", "/usr/bin/ffmpeg")
-        ffmpeg_cmd = [
-            ffmpeg_path,
-            "-re",  # Lire à la vitesse réelle
-            "-stream_loop",
-            "-1",  # Boucle infinie
-            "-i",
-            video_path,  # Fichier d'entrée
-            "-c:v",
-            "libx264",  # Codec vidéo H.264
-            "-preset",
-            "ultrafast",  # Preset rapide pour streaming
-            "-b:v",
-            "500k",  # Bitrate vidéo 500k
-            "-maxrate",
-            "800k",  # Bitrate maximum 800k
-            "-bufsize",
-            "1200k",  # Taille du buffer 1200k
-            "-s",
-            "640x360",  # Résolution 640x360
-            "-g",
-            "60",  # GOP size 60
-            "-keyint_min",
-            "60",  # Keyframe minimum 60
-            "-c:a",
-            "aac",  # Codec audio AAC
-            "-b:a",
-            "96k",  # Bitrate audio 96k
-            "-f",
-            "flv",  # Format de sortie FLV
-            "-reconnect",
-            "1",  # Activer la reconnexion
-            "-reconnect_streamed",
-            "1",  # Reconnexion pour streaming
-            "-reconnect_delay_max",
-            "2",  # Délai max de reconnexion 2s
-            rtmp_url,  # URL de destination RTMP
-        ]
-
-        print(f"[DEBUG] Démarrage live {live.id}")
-        print(f"[DEBUG] Commande FFmpeg: {' '.join(ffmpeg_cmd)}")
-
-        # Lancer FFmpeg en arrière-plan (compatible Windows et Linux)
-        if sys.platform.startswith("win"):
-            # Windows: utiliser subprocess.Popen avec creationflags
-            process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-            )
-        else:
-            # Linux/Unix: utiliser subprocess.Popen normal
-            process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True,  # Créer une nouvelle session
-            )
-
-        # Sauvegarder le PID et mettre à jour le statut
-        live.ffmpeg_pid = process.pid
-        live.status = "running"
-        live.save()
-
-        print(f"[DEBUG] Live {live.id} démarré avec PID {process.pid}")
-
-        return JsonResponse(
-            {
-                "success": True,
-                "message": f"Live démarré avec succès (PID: {process.pid})",
-            }
-        )
+        # Admission selon la capacité CPU; le superviseur lance ensuite FFmpeg
+        return _admission_response(live, "Live en cours de démarrage")
 
     except Exception as e:
         print(f"[DEBUG] Erreur lors du démarrage du live {live.id}: {str(e)}")
-        live.status = "failed"
-        live.save()
+        states.transition(live, "failed", ["pending"])
         return JsonResponse(
             {"success": False, "message": f"Erreur lors du démarrage: {str(e)}"}
         )
@@ -392,62 +761,25 @@ def stop_live(request, live_id):
     """Arrêt d'un live."""
     live = get_object_or_404(Live, id=live_id, user=request.user)
 
-    if not live.is_running:
+    if states.transition(live, "completed", ["queued"]):
+        return JsonResponse(
+            {"success": True, "message": "Live retiré de la file d'attente"}
+        )
+    # Un seul arrêt par live, même en cas de double clic; la réponse
+    # n'attend pas la fin de FFmpeg (statut ``stopping`` jusque-là)
+    if not states.transition(live, "stopping", ["starting", "running"]):
         return JsonResponse({"success": False, "message": "Live non en cours"})
 
     try:
-        # Arrêter le processus FFmpeg si un PID est enregistré
-        if live.ffmpeg_pid:
-            print(f"[DEBUG] Arrêt du live {live.id} avec PID {live.ffmpeg_pid}")
-
-            try:
-                # Arrêter le processus selon la plateforme
-                if sys.platform.startswith("win"):
-                    # Windows: utiliser taskkill
-                    subprocess.run(
-                        ["taskkill", "/F", "/PID", str(live.ffmpeg_pid)],
-                        capture_output=True,
-                        timeout=10,
-                    )
-                else:
-                    # Linux/Unix: utiliser os.kill
-                    os.kill(live.ffmpeg_pid, 15)  # SIGTERM
-
-                    # Attendre un peu pour voir si le processus s'arrête
-                    import time
-
-                    time.sleep(2)
-
-                    # Vérifier si le processus existe encore
-                    try:
-                        os.kill(live.ffmpeg_pid, 0)  # Test si le processus existe
-                        # Si on arrive ici, le processus existe encore, le forcer
-                        os.kill(live.ffmpeg_pid, 9)  # SIGKILL
-                        print(f"[DEBUG] Processus {live.ffmpeg_pid} forcé à s'arrêter")
-                    except OSError:
-                        print(f"[DEBUG] Processus {live.ffmpeg_pid} arrêté proprement")
-
-            except Exception as e:
-                print(
-                    f"[DEBUG] Erreur lors de l'arrêt du processus "
-                    f"{live.ffmpeg_pid}: {e}"
-                )
-                # Le processus n'existe peut-être plus, continuer
-
-        # Mettre à jour le statut
-        live.status = "completed"
-        live.ffmpeg_pid = None
-        live.save()
-
-        print(f"[DEBUG] Live {live.id} arrêté avec succès")
-
-        return JsonResponse({"success": True, "message": "Live arrêté avec succès"})
-
+        # Le PID n'a de sens que sur le nœud qui diffuse: l'arrêt lui est
+        # confié via sa file Celery
+        print(f"[DEBUG] Arrêt du live {live.id} demandé au nœud {live.node}")
+        dispatch_stop(live)
     except Exception as e:
-        print(f"[DEBUG] Erreur lors de l'arrêt du live {live.id}: {str(e)}")
-        return JsonResponse(
-            {"success": False, "message": f"Erreur lors de l'arrêt: {str(e)}"}
-        )
+        # Le superviseur du nœud arrête de toute façon les lives ``stopping``
+        print(f"[DEBUG] Arrêt du live {live.id} non transmis: {str(e)}")
+
+    return JsonResponse({"success": True, "message": "Arrêt du live en cours"})
 
 
 @login_required
@@ -463,8 +795,7 @@ def restart_live(request, live_id):
 
     try:
         # Vérifier que le fichier vidéo existe
-        video_path = os.path.join("media", live.video_file.name)
-        if not os.path.exists(video_path):
+        if not os.path.exists(live.video_file.path):
             return JsonResponse(
                 {"success": False, "message": "Fichier vidéo introuvable"}
             )
@@ -475,90 +806,74 @@ def restart_live(request, live_id):
                 {"success": False, "message": "Aucune clé de streaming configurée"}
             )
 
-        rtmp_url = live.stream_key.key
-        ffmpeg_path = getattr(settings, "FFMPEG_PATH", "/usr/bin/ffmpeg")
-
-        # Commande FFmpeg pour relancer le live
-        ffmpeg_cmd = [
-            ffmpeg_path,
-            "-re",
-            "-stream_loop",
-            "-1",
-            "-i",
-            video_path,
-            "-c:v",
-            "libx264",
-            "-preset",
-            "ultrafast",
-            "-b:v",
-            "500k",
-            "-maxrate",
-            "800k",
-            "-bufsize",
-            "1200k",
-            "-s",
-            "640x360",
-            "-g",
-            "60",
-            "-keyint_min",
-            "60",
-            "-c:a",
-            "aac",
-            "-b:a",
-            "96k",
-            "-f",
-            "flv",
-            "-reconnect",
-            "1",
-            "-reconnect_streamed",
-            "1",
-            "-reconnect_delay_max",
-            "2",
-            rtmp_url,
-        ]
-
-        print(
-            f"[DEBUG] Relance du live {live.id} avec la commande: "
-            f"{' '.join(ffmpeg_cmd)}"
-        )
-
-        # Démarrer le processus FFmpeg selon la plateforme
-        if sys.platform.startswith("win"):
-            process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-            )
-        else:
-            process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True,
-            )
-
-        # Enregistrer le PID et mettre à jour le statut
-        live.ffmpeg_pid = process.pid
-        live.status = "running"
-        live.save()
-
-        print(f"[DEBUG] Live {live.id} relancé avec succès (PID: {process.pid})")
-
-        return JsonResponse({"success": True, "message": "Live relancé avec succès"})
+        # Admission selon la capacité CPU; le superviseur relance ensuite FFmpeg
+        if not states.transition(live, "pending", ["completed", "failed"]):
+            return JsonResponse({"success": False, "message": "Live déjà relancé"})
+        return _admission_response(live, "Live en cours de relance")
 
     except Exception as e:
         print(f"[DEBUG] Erreur lors de la relance du live {live.id}: {str(e)}")
-        live.status = "failed"
-        live.save()
+        states.transition(live, "failed", ["pending"])
         return JsonResponse(
             {"success": False, "message": f"Erreur lors de la relance: {str(e)}"}
         )
 
 
+async def live_events(request):
+    """Flux Server-Sent Events des lives de l'utilisateur (statut, santé,
+    préparation). Vue asynchrone: à servir par ``livemanager.asgi``."""
+    if not isinstance(request, ASGIRequest):
+        # Serveur WSGI: 204 indique au navigateur de ne pas se reconnecter
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    return StreamingHttpResponse(
+        events.stream(user.id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@login_required
+def live_health(request, live_id):
+    """Santé d'un live: dernières mesures FFmpeg (vitesse, fps, débit) en JSON."""
+    live = get_object_or_404(Live, id=live_id, user=request.user)
+    samples = list(live.health_samples.all()[:60])
+    return JsonResponse(
+        {
+            "live_id": live.id,
+            "status": live.status,
+            "latest": samples[0].as_dict() if samples else None,
+            "is_behind": samples[0].is_behind if samples else False,
+            "samples": [sample.as_dict() for sample in reversed(samples)],
+        }
+    )
+
+
+def _approval_etag(request):
+    """ETag calculé sans charger l'utilisateur: id de la session et version
+    ``approval`` en cache, incrémentée par ``signals.publish_approval``."""
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        return None
+    try:
+        return f"{user_id}-{fragments.version('approval', user_id)}"
+    except redis.RedisError as e:
+        print(f"[DEBUG] Version d'approbation indisponible: {e}")
+        return None
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_approval_etag)
 @login_required
 def check_approval_status(request):
-    """Vérifier le statut d'approbation de l'utilisateur (AJAX)."""
+    """Vérifier le statut d'approbation de l'utilisateur (AJAX).
+
+    Les changements sont poussés par l'événement ``approval`` (voir
+    ``signals.publish_approval``); cette vue ne sert qu'au rattrapage après
+    une reconnexion, et répond 304 tant que le statut n'a pas changé.
+    """
     return JsonResponse(
         {"is_approved": request.user.is_approved, "username": request.user.username}
     )
@@ -567,24 +882,81 @@ def check_approval_status(request):
 @user_passes_test(is_admin)
 def admin_dashboard(request):
     """Dashboard administrateur."""
-    total_users = User.objects.count()
-    approved_users = User.objects.filter(is_approved=True).count()
-    total_lives = Live.objects.count()
-    running_lives = Live.objects.filter(status="running").count()
     context = {
-        "total_users": total_users,
-        "approved_users": approved_users,
-        "total_lives": total_lives,
-        "running_lives": running_lives,
+        **stats.admin_stats(),
+        "users": User.objects.order_by("-date_joined")[:5],
+        "all_lives": Live.objects.select_related("user", "node").order_by(
+            "-created_at"
+        )[:100],
+        "nodes": StreamNode.objects.all(),
+        "status_choices": Live.STATUS_CHOICES,
     }
     return render(request, "streams/admin_dashboard.html", context)
 
 
+@user_passes_test(is_admin)
+@require_POST
+def admin_bulk_lives(request):
+    """Démarrage, arrêt ou relance groupés de lives (cases cochées ou filtres).
+
+    Une requête pour tout l'ensemble: chaque transition est un seul UPDATE,
+    les processus sont ensuite démarrés et arrêtés par les superviseurs.
+    """
+    action = request.POST.get("action")
+    lives = bulk.filter_lives(request.POST)
+    if action not in bulk.ACTIONS:
+        success, message = False, "Action inconnue"
+    elif lives is None:
+        success, message = False, "Aucun live sélectionné"
+    else:
+        count = bulk.ACTIONS[action](lives)
+        print(f"[DEBUG] Action groupée {action}: {count} live(s)")
+        success, message = True, f"{count} live(s) traité(s)"
+
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse({"success": success, "message": message})
+    (messages.success if success else messages.error)(request, message)
+    return redirect("admin_dashboard")
+
+
+@user_passes_test(is_admin)
+def admin_cache_stats(request):
+    """Hits/misses du cache des fragments de pages (JSON)."""
+    return JsonResponse(fragments.counters())
+
+
 @user_passes_test(is_admin)
 def admin_users(request):
-    """Gestion des utilisateurs par l'admin."""
-    users = User.objects.all().order_by("-date_joined")
-    return render(request, "streams/admin_users.html", {"users": users})
+    """Gestion des utilisateurs par l'admin: recherche, filtre, pagination.
+
+    Le nombre de lives de chaque utilisateur est calculé dans la même requête.
+    """
+    users = User.objects.annotate(
+        live_count=Count("live"),
+        running_count=Count("live", filter=Q(live__status="running")),
+    ).order_by("-date_joined", "-id")
+    search = request.GET.get("search", "").strip()
+    if search:
+        users = users.filter(Q(username__icontains=search) | Q(email__icontains=search))
+    status_filter = request.GET.get("status", "")
+    if status_filter == "pending":
+        users = users.filter(is_approved=False)
+    elif status_filter == "approved":
+        users = users.filter(is_approved=True)
+    elif status_filter == "admin":
+        users = users.filter(is_admin=True)
+
+    page = Paginator(users, settings.ADMIN_USERS_PAGE_SIZE).get_page(
+        request.GET.get("page")
+    )
+    context = {
+        "users": page.object_list,
+        "page_obj": page,
+        "stats": stats.admin_stats(),
+        "search": search,
+        "status_filter": status_filter,
+    }
+    return render(request, "streams/admin_users.html", context)
 
 
 @user_passes_test(is_admin)